@@ -0,0 +1,34 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+/*
+    ✅ BatchTransfer — airdrop ERC20 en lots
+    L'émetteur approuve ce contrat pour le total, puis envoie un lot par tx :
+    batchTransferFrom(token, [destinataires], [montants])
+*/
+
+interface IERC20 {
+    function transferFrom(address from, address to, uint256 amount) external returns (bool);
+}
+
+contract BatchTransfer {
+    event BatchSent(address indexed token, address indexed sender, uint256 recipients, uint256 total);
+
+    function batchTransferFrom(
+        address token,
+        address[] calldata recipients,
+        uint256[] calldata amounts
+    ) external {
+        uint256 count = recipients.length;
+        require(count == amounts.length, "Length mismatch");
+
+        IERC20 erc20 = IERC20(token);
+        uint256 total;
+        for (uint256 i = 0; i < count; ) {
+            require(erc20.transferFrom(msg.sender, recipients[i], amounts[i]), "Transfer failed");
+            total += amounts[i];
+            unchecked { ++i; }
+        }
+        emit BatchSent(token, msg.sender, count, total);
+    }
+}
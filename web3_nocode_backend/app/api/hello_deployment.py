@@ -1,15 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.api.schemas.hello_storage import HelloStorageDeployRequest
-from app.api.services.solidity_compiler import compile_contract
+from app.api.services.solidity_compiler import compile_contract_async
 from app.config.networks import NETWORKS
 from app.db.models.deployment import  DeploymentRecord, Deployment
+from app.utils.rpc_utils import get_web3
+from app.core.responses import FastJSONResponse
+from app.api.rate_limit import rate_limit
+from app.api.services.contract_index import register_deployment
 from datetime import datetime
-from web3 import Web3
+from eth_utils import is_address
 
 router = APIRouter()
 
 
-@router.post("/hello-storage")
+@router.post("/hello-storage", dependencies=[Depends(rate_limit("deploy.hello_storage", cost=10))])
 async def prepare_hello_storage_deployment(
     data: HelloStorageDeployRequest
 ):
@@ -19,16 +23,17 @@ async def prepare_hello_storage_deployment(
         raise HTTPException(400, f"Unsupported network: {network}")
 
     try:
-        abi, bytecode = compile_contract(
+        abi, bytecode = await compile_contract_async(
             "app/api/contracts/hello.sol",
-            "HelloStorage"
+            "HelloStorage",
+            abi_as_json=True,
         )
 
-        return {
+        return FastJSONResponse({
             "abi": abi,
             "bytecode": bytecode,
             "constructorArgs": [data.initial_message],
-        }
+        })
 
     except Exception as e:
         raise HTTPException(500, str(e))
@@ -39,19 +44,19 @@ async def read_message(
     address: str = Query(...),
     network: str = Query("anvil"),
 ):
-    if not Web3.is_address(address):
+    if not is_address(address):
         raise HTTPException(400, "Invalid contract address")
 
     net = NETWORKS.get(network)
     if not net:
         raise HTTPException(400, "Unsupported network")
 
-    abi, _ = compile_contract(
+    abi, _ = await compile_contract_async(
         "app/api/contracts/hello.sol",
         "HelloStorage"
     )
 
-    w3 = Web3(Web3.HTTPProvider(net.rpc_url))
+    w3 = get_web3(net.rpc_url, network)
     contract = w3.eth.contract(address=address, abi=abi)
 
     try:
@@ -71,12 +76,13 @@ async def record_hello_storage(data: DeploymentRecord):
             user_id=data.user_id.lower(),
             project_id=data.project_id or "lab001",
             build_id=data.build_id or "storage",
-            status="deployed",
+            status="pending" if data.tx_hash else "deployed",  # 👈 suivi par deployment_tracker
             abi=data.abi,
             contract_type="hello_storage", # 👈 Pour différencier de l'ERC20
             created_at=datetime.utcnow(),
         )
         await record.insert()
+        await register_deployment(str(record.id), record.chain, record.contract_address, record.abi)
         return {"ok": True, "id": str(record.id)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -85,10 +91,11 @@ async def record_hello_storage(data: DeploymentRecord):
 async def get_storage_abi():
     """Version simplifiée pour le frontend"""
     try:
-        abi, _ = compile_contract(
+        abi, _ = await compile_contract_async(
             "app/api/contracts/hello.sol",
-            "HelloStorage"
+            "HelloStorage",
+            abi_as_json=True,
         )
-        return {"abi": abi}
+        return FastJSONResponse({"abi": abi})
     except Exception as e:
         raise HTTPException(500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,141 @@
+# app/api/rate_limit.py
+"""
+Limitation de débit distribuée (token bucket dans Redis).
+
+Chaque utilisateur (ou IP si anonyme) a un bucket dont la capacité et la
+vitesse de recharge dépendent de son plan ; chaque route coûteuse consomme
+un nombre de jetons proportionnel à son coût réel (solc, RPC, explorer).
+Le script Lua rend lecture + recharge + débit atomiques : tous les workers
+voient le même état.
+
+    @router.post("/prepare_erc20", dependencies=[Depends(rate_limit("deploy.prepare_erc20", cost=10))])
+"""
+import math
+
+from fastapi import HTTPException, Request
+
+from app.api.routes_auth import read_session
+from app.config.settings import settings
+from app.core.metrics import RATE_LIMIT_DECISIONS
+from app.core.redis_client import get_redis
+
+KEY_PREFIX = "ratelimit:"
+
+# KEYS[1] = bucket ; ARGV = capacité, jetons/s, coût
+# → {autorisé (0/1), jetons restants, secondes avant d'avoir `coût` jetons}
+# L'heure vient de Redis (TIME) : pas de dérive d'horloge entre workers.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or t
+tokens = math.min(capacity, tokens + math.max(0, t - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', t)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+_script = None
+
+
+def _bucket_script():
+    # ré-enregistré si le client Redis a été recréé (lifespan)
+    global _script
+    client = get_redis()
+    if _script is None or _script.registered_client is not client:
+        _script = client.register_script(TOKEN_BUCKET_LUA)
+    return _script
+
+
+REQUIRED_PLANS = ("anonymous", "free")
+
+
+def validate_plans():
+    """
+    Démarrage : RATE_LIMIT_PLANS (surchargeable par l'env) doit définir
+    anonymous et free, et chaque plan [capacité > 0, jetons/s > 0].
+    """
+    plans = settings.RATE_LIMIT_PLANS
+    missing = [name for name in REQUIRED_PLANS if name not in plans]
+    if missing:
+        raise ValueError(f"RATE_LIMIT_PLANS is missing required plans: {missing}")
+    for name, limits in plans.items():
+        try:
+            capacity, refill = limits
+            valid = float(capacity) > 0 and float(refill) > 0
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise ValueError(f"RATE_LIMIT_PLANS[{name!r}] must be [capacity > 0, refill > 0], got {limits!r}")
+
+
+def _plan_limits(plan: str) -> tuple[str, float, float]:
+    # plan inconnu (JWT ancien, plan retiré de la config) : limites du plan free
+    if plan not in settings.RATE_LIMIT_PLANS:
+        plan = "free"
+    capacity, refill = settings.RATE_LIMIT_PLANS[plan]
+    return plan, capacity, refill
+
+
+def _identity(request: Request) -> tuple[str, str]:
+    """(clé du bucket, plan) : utilisateur connecté, sinon IP."""
+    session = read_session(request)
+    if session:
+        plan = session.get("plan", "free")
+        return f"user:{session['sub']}", plan
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}", "anonymous"
+
+
+def rate_limit(route: str, cost: int = 1):
+    """
+    Dépendance FastAPI : débite `cost` jetons (surchargeable via
+    RATE_LIMIT_COSTS[route]) du bucket de l'appelant, 429 sinon.
+    """
+
+    async def dependency(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        weight = settings.RATE_LIMIT_COSTS.get(route, cost)
+        identity, plan = _identity(request)
+        plan, capacity, refill = _plan_limits(plan)
+        if weight > capacity:
+            # coût mal configuré : le bucket ne pourrait jamais l'accepter
+            raise HTTPException(500, f"Rate limit cost {weight} exceeds bucket capacity {capacity} ({plan})")
+
+        try:
+            allowed, remaining, retry_after = await _bucket_script()(
+                keys=[KEY_PREFIX + identity],
+                args=[capacity, refill, weight],
+            )
+        except Exception as e:
+            # Redis indisponible : on laisse passer plutôt que de couper le service
+            print(f"⚠️ Rate limiter unavailable: {e}")
+            RATE_LIMIT_DECISIONS.labels(route, plan, "bypass").inc()
+            return
+
+        if not int(allowed):
+            RATE_LIMIT_DECISIONS.labels(route, plan, "limited").inc()
+            raise HTTPException(429, "Rate limit exceeded", headers={
+                "Retry-After": str(max(1, math.ceil(float(retry_after)))),
+                "X-RateLimit-Limit": str(capacity),
+                "X-RateLimit-Remaining": str(int(float(remaining))),
+            })
+        RATE_LIMIT_DECISIONS.labels(route, plan, "allowed").inc()
+
+    return dependency
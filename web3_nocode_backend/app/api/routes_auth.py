@@ -1,25 +1,42 @@
 from fastapi import APIRouter, HTTPException, Response, Request, Depends
 from pydantic import BaseModel
 from datetime import datetime, timedelta, timezone
-from eth_account import Account
-from eth_account.messages import encode_defunct
 from jose import jwt, JWTError
 import secrets, re, os
 from app.db.models.user import User
 from app.db.models.auth_model import VerifyPayload
+from app.core.redis_client import get_redis
 
 router = APIRouter()
-# --- stockages temporaires ---
-NONCES = set()
+# --- stockages partagés (Redis) : valables quel que soit le worker ---
+NONCE_PREFIX = "siwe:nonce:"
+NONCE_TTL_SEC = 10 * 60
+JWT_SECRET_KEY = "auth:jwt_secret"
 
 
 # --- Configs ---
 APP_DOMAIN = os.getenv("APP_DOMAIN", "localhost:3000")
-JWT_SECRET = os.getenv("JWT_SECRET", secrets.token_urlsafe(32))
+JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ISS = "nocode-web3"
 JWT_EXP_MIN = 60
 
 
+async def init_jwt_secret():
+    """
+    Sans JWT_SECRET en env, un secret aléatoire est partagé via Redis
+    (SET NX : le premier worker le crée, les autres le relisent). Sinon
+    chaque worker signerait avec le sien et les sessions sauteraient
+    d'un worker à l'autre.
+    """
+    global JWT_SECRET
+    if JWT_SECRET:
+        return
+    redis = get_redis()
+    await redis.set(JWT_SECRET_KEY, secrets.token_urlsafe(32), nx=True)
+    JWT_SECRET = await redis.get(JWT_SECRET_KEY)
+    print("⚠️ JWT_SECRET not set: using a generated secret shared through Redis")
+
+
 # --- Helpers ---
 def set_session_cookie(resp: Response, token: str):
     resp.set_cookie(
@@ -54,12 +71,20 @@ def parse_siwe(msg: str):
             fields["expirationTime"] = line.split("Expiration Time:")[1].strip()
     return {"domain": domain, "address": address, **fields}
 
-def make_jwt(sub: str, addr: str):
+def recover_signer(msg: str, sig: str) -> str:
+    # eth_account (py_ecc, ~1 s d'import) chargé au premier login seulement
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+
+    return Account.recover_message(encode_defunct(text=msg), signature=sig)
+
+def make_jwt(sub: str, addr: str, plan: str = "free"):
     now = datetime.now(timezone.utc)
     payload = {
         "iss": JWT_ISS,
         "sub": sub,
         "addr": addr,
+        "plan": plan,
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(minutes=JWT_EXP_MIN)).timestamp()),
     }
@@ -75,12 +100,22 @@ def require_auth(req: Request):
         raise HTTPException(status_code=401, detail="Invalid session")
     return payload
 
+def read_session(req: Request) -> dict | None:
+    """Payload de session si le cookie est valide, None sinon (routes publiques)."""
+    token = req.cookies.get("session")
+    if not token or not JWT_SECRET:
+        return None
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=["HS256"], options={"require": ["exp", "iat", "sub"]})
+    except JWTError:
+        return None
+
 # --- Routes ---
 
 @router.get("/siwe/nonce")
 async def get_nonce():
     n = secrets.token_urlsafe(12)
-    NONCES.add(n)
+    await get_redis().set(NONCE_PREFIX + n, 1, ex=NONCE_TTL_SEC)
     return {"nonce": n}
 
 @router.post("/siwe/verify")
@@ -91,12 +126,12 @@ async def verify(p: VerifyPayload, response: Response):
     # 1️⃣ Validation du message
     if siwe["domain"] != APP_DOMAIN:
         raise HTTPException(400, f"Bad domain: {siwe['domain']}")
-    if "nonce" not in siwe or siwe["nonce"] not in NONCES:
+    # GETDEL : lecture + consommation atomiques (un seul worker peut l'utiliser)
+    if "nonce" not in siwe or not await get_redis().getdel(NONCE_PREFIX + siwe["nonce"]):
         raise HTTPException(400, "Nonce invalid/used")
-    NONCES.discard(siwe["nonce"])
 
     # 2️⃣ Vérification de la signature
-    recovered = Account.recover_message(encode_defunct(text=msg), signature=sig)
+    recovered = recover_signer(msg, sig)
     if recovered.lower() != siwe["address"].lower():
         raise HTTPException(400, "Signature mismatch")
 
@@ -112,7 +147,7 @@ async def verify(p: VerifyPayload, response: Response):
         await user.insert()
 
     # 4️⃣ Création du JWT
-    token = make_jwt(sub=str(user.id), addr=addr)
+    token = make_jwt(sub=str(user.id), addr=addr, plan=user.plan)
     set_session_cookie(response, token)
 
     return {"ok": True, "address": addr, "user_id": user.id}
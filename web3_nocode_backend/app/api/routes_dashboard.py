@@ -1,15 +1,30 @@
 # app/api/routes_dashboard.py
-from fastapi import APIRouter, HTTPException
+import asyncio
+from contextlib import aclosing
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
 from app.db.models.user import User
-from app.db.models.deployment import Deployment, DeploymentRecord
+from app.db.models.deployment import Deployment
 from beanie import PydanticObjectId
-from web3 import Web3
+from eth_utils import from_wei, is_address, to_checksum_address
 from app.utils.etherscan_utils import get_wallet_activity
+from app.utils.rpc_utils import NETWORK_RPC, rpc
+from app.utils.log_fetcher import iter_logs
+from app.utils.log_utils import ERC20_TRANSFER_TOPIC, decode_transfer_log
+from app.utils.abi_index import abi_index
+from app.api.services.portfolio import get_portfolio
+from app.api.services.head_follower import head_follower
+from app.core.responses import FastJSONResponse
+from app.api.rate_limit import rate_limit
 from fastapi import Query
 
 
 router = APIRouter()
 
+# blocs lus au plus par /contract/transactions (~1 mois sur ethereum) : sans
+# bloc de déploiement connu, un token peu actif ferait remonter jusqu'à la genèse
+CONTRACT_TXS_MAX_SCAN_BLOCKS = 200_000
+
 ERC20_TRANSFER_EVENT = {
     "anonymous": False,
     "inputs": [
@@ -22,18 +37,6 @@ ERC20_TRANSFER_EVENT = {
 }
 
 
-# 🌐 RPC endpoints supportés
-NETWORK_RPC = {
-    "anvil": "http://127.0.0.1:8545",
-    "ethereum": "https://mainnet.infura.io/v3/388983b8720e4493844f9ac9ba1f725c",
-    "sepolia": "https://sepolia.infura.io/v3/388983b8720e4493844f9ac9ba1f725c",
-    "polygon": "https://polygon-rpc.com",
-    "bsc": "https://bsc-dataseed.binance.org",
-    "avalanche": "https://api.avax.network/ext/bc/C/rpc",
-}
-
-
-
 @router.get("/user/{user_id}")
 async def get_user_dashboard_by_id(user_id: str):
     """
@@ -92,97 +95,122 @@ async def get_user_dashboard_by_wallet(address: str, network: str = "sepolia"):
         if not rpc_url:
             raise HTTPException(status_code=400, detail=f"Unsupported network: {network}")
 
-        # ✅ Étape 2 — Connexion Web3
-        web3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not web3.is_connected():
-            raise HTTPException(status_code=500, detail=f"Cannot connect to {network} RPC")
-
-        # ✅ Étape 3 — Récupération du solde
-        balance_wei = web3.eth.get_balance(address)
-        balance_eth = web3.from_wei(balance_wei, "ether")
+        # ✅ Étape 2/3 — Récupération du solde (RPC hors du loop, coalescé)
+        balance_wei = await rpc(network, "get_balance", address)
+        balance_eth = from_wei(balance_wei, "ether")
 
-        # ✅ Étape 4 — Récupération des déploiements depuis Mongo
-        deployments = await DeploymentRecord.find(DeploymentRecord.user_id == address).to_list()
+        # ✅ Étape 4 — Récupération des déploiements depuis Mongo (documents bruts)
+        deployments = await Deployment.get_motor_collection().find(
+            {"user_id": address.lower()}
+        ).to_list(length=None)
 
         # ✅ Étape 5 — Récupération des transactions depuis Etherscan
-        transactions = await get_wallet_activity(address, network=network)
+        transactions = abi_index.label_txs(await get_wallet_activity(address, network=network), network)
 
-        return {
+        return FastJSONResponse({
             "address": address,
             "network": network,
             "balance": float(balance_eth),
-            "deployments": [d.dict() for d in deployments],
+            "deployments": deployments,
             "transactions": transactions,
-        }
+        })
 
     except Exception as e:
         print(f"❌ Error in get_user_dashboard_by_wallet: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-ERC20_TRANSFER_TOPIC = Web3.keccak(
-    text="Transfer(address,address,uint256)"
-)
+@router.get("/portfolio/{address}", dependencies=[Depends(rate_limit("dashboard.portfolio", cost=8))])
+async def get_portfolio_by_wallet(
+    address: str,
+    networks: str | None = Query(None, description="ex: sepolia,polygon (défaut : toutes)"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Soldes, déploiements et activité récente sur toutes les chaînes en une requête.
+    Chaque chaîne a son statut (ok / partial / error / timeout).
+    """
+    if not is_address(address):
+        raise HTTPException(status_code=400, detail="Invalid wallet address")
+
+    selected = [n.strip().lower() for n in networks.split(",")] if networks else None
+    unknown = [n for n in selected or [] if n not in NETWORK_RPC]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported network: {', '.join(unknown)}")
+
+    return FastJSONResponse(await get_portfolio(address, selected, activity_limit=limit))
 
-@router.get("/contract/transactions")
+
+@router.get("/contract/transactions", dependencies=[Depends(rate_limit("dashboard.contract_transactions", cost=5))])
 async def get_contract_transactions(
     contract_address: str,
     network: str = Query("anvil"),
     limit: int = Query(20),
 ):
     try:
-        rpc_url = NETWORK_RPC.get(network.lower())
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        
-        checksum_address = Web3.to_checksum_address(contract_address)
+        network = network.lower()
+        if network not in NETWORK_RPC:
+            raise ValueError(f"Unsupported network: {network}")
+
+        checksum_address = to_checksum_address(contract_address)
         
-        logs = w3.eth.get_logs({
-            "fromBlock": 0,
-            "toBlock": "latest",
-            "address": checksum_address,
-            "topics": [ERC20_TRANSFER_TOPIC],
-        })
+        # Du bloc courant vers le déploiement (ou CONTRACT_TXS_MAX_SCAN_BLOCKS en
+        # arrière), par fenêtres adaptatives : on s'arrête dès `limit` transferts
+        # trouvés (un seul 0 → latest est refusé par Infura & co)
+        head = await head_follower.head_number(network)
+        deployment = await Deployment.get_motor_collection().find_one(
+            {
+                "chain": network,
+                "contract_address": {"$in": [contract_address, contract_address.lower(), checksum_address]},
+                "block_number": {"$ne": None},
+            },
+            projection={"block_number": 1},
+        )
+        from_block = max(deployment["block_number"] if deployment else 0, head - CONTRACT_TXS_MAX_SCAN_BLOCKS + 1, 0)
+        target_logs = []
+        async with aclosing(iter_logs(network, checksum_address, [ERC20_TRANSFER_TOPIC], from_block, head, descending=True)) as chunks:
+            async for logs in chunks:
+                target_logs.extend(reversed(logs))
+                if len(target_logs) >= limit:
+                    break
+        target_logs = target_logs[:limit]
+
+        async def enrich(log):
+            # 1. Reçu (gas) + 2. Bloc (timestamp), en parallèle
+            receipt, block_info = await asyncio.gather(
+                rpc(network, "get_transaction_receipt", log["transactionHash"]),
+                rpc(network, "get_block", log["blockNumber"]),
+            )
+
+            # Conversion du timestamp en format lisible (ISO ou string)
+            dt_object = datetime.fromtimestamp(block_info["timestamp"])
+            formatted_time = dt_object.strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+            # Extraction des adresses et valeurs
+            transfer = decode_transfer_log(log)
+
+            return {
+                "tx_hash": log["transactionHash"].hex(),
+                "from": transfer["from"],
+                "to": transfer["to"],
+                "value": str(transfer["value"]),
+                "block": log["blockNumber"],
+                "block_hash": log["blockHash"].hex(),
+                "block_time": formatted_time,
+                "gas_used": receipt["gasUsed"] # <--- Le champ manquant est ici
+            }
 
         txs = []
-        # On limite avant la boucle pour éviter de trop solliciter le RPC
-        target_logs = list(reversed(logs))[:limit]
-
-        for log in target_logs:
-            try:
-                # 1. Récupération du Reçu (Transaction Receipt) pour le Gas
-                receipt = w3.eth.get_transaction_receipt(log["transactionHash"])
-                
-                # 2. Récupération du Bloc pour le Timestamp et le Hash du bloc
-                block_info = w3.eth.get_block(log["blockNumber"])
-                
-                # Conversion du timestamp en format lisible (ISO ou string)
-                from datetime import datetime
-                dt_object = datetime.fromtimestamp(block_info["timestamp"])
-                formatted_time = dt_object.strftime("%a, %d %b %Y %H:%M:%S +0000")
-
-                # Extraction des adresses et valeurs
-                from_addr = "0x" + log["topics"][1].hex()[-40:]
-                to_addr   = "0x" + log["topics"][2].hex()[-40:]
-                data_hex = log["data"].hex() if isinstance(log["data"], bytes) else log["data"]
-                value = int(data_hex, 16) if data_hex and data_hex != '0x' else 0
-
-                txs.append({
-                    "tx_hash": log["transactionHash"].hex(),
-                    "from": Web3.to_checksum_address(from_addr),
-                    "to": Web3.to_checksum_address(to_addr),
-                    "value": str(value),
-                    "block": log["blockNumber"],
-                    "block_hash": log["blockHash"].hex(),
-                    "block_time": formatted_time,
-                    "gas_used": receipt["gasUsed"] # <--- Le champ manquant est ici
-                })
-            except Exception as e:
-                print(f"⚠️ Error enriching log: {e}")
+        for result in await asyncio.gather(*(enrich(log) for log in target_logs), return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"⚠️ Error enriching log: {result}")
                 continue
+            txs.append(result)
 
         return {
             "contract": checksum_address,
             "network": network,
+            "from_block": from_block,
             "transactions": txs
         }
 
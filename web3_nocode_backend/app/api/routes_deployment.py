@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import datetime
 from app.db.models.deployment import DeploymentRecord, Deployment
 from app.utils.etherscan_utils import (
     get_wallet_balance,
     get_wallet_activity,
 )
-from app.api.services.solidity_compiler import compile_contract
+from app.api.services.solidity_compiler import compile_contract_async
 from app.config.settings import settings
+from app.core.responses import FastJSONResponse
+from app.api.rate_limit import rate_limit
+from app.api.services.deployment_tracker import current_statuses, status_events
+from app.api.services.contract_index import register_deployment
+from app.utils.abi_index import abi_index
+from fastapi.responses import StreamingResponse
 
 router = APIRouter()
 
@@ -14,20 +20,21 @@ router = APIRouter()
 import traceback
 from fastapi import HTTPException
 
-@router.post("/prepare_erc20")
+@router.post("/prepare_erc20", dependencies=[Depends(rate_limit("deploy.prepare_erc20", cost=10))])
 async def prepare_erc20(data: dict):
     try:
-        abi, bytecode = compile_contract(
+        abi, bytecode = await compile_contract_async(
             "app/api/contracts/erc20_openzeppelin.sol",
-            "MyToken"
+            "MyToken",
+            abi_as_json=True,  # 👈 ABI pré-sérialisée, copiée telle quelle
         )
 
-        return {
+        return FastJSONResponse({
             "abi": abi,
             "bytecode": bytecode,
             "standard": "ERC20",
             "openzeppelin": True
-        }
+        })
 
     except Exception as e:
         print("❌ ERC20 compilation error")
@@ -41,6 +48,29 @@ async def prepare_erc20(data: dict):
         )
 
 
+@router.post("/prepare_batch_transfer", dependencies=[Depends(rate_limit("deploy.prepare_batch_transfer", cost=10))])
+async def prepare_batch_transfer():
+    """Contrat BatchTransfer utilisé par /tokens/{address}/airdrop/prepare."""
+    try:
+        abi, bytecode = await compile_contract_async(
+            "app/api/contracts/batch_transfer.sol",
+            "BatchTransfer",
+            abi_as_json=True,
+        )
+        return FastJSONResponse({"abi": abi, "bytecode": bytecode})
+
+    except Exception as e:
+        print("❌ BatchTransfer compilation error")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": str(e),
+                "type": type(e).__name__,
+            }
+        )
+
+
 
 
 @router.post("/record_erc20")
@@ -54,12 +84,13 @@ async def record_deployment(data: DeploymentRecord):
             user_id=data.user_id.lower() or "unknown",
             project_id=data.project_id or "nocode",
             build_id=data.build_id or "auto",
-            status="deployed",
+            status="pending" if data.tx_hash else "deployed",  # 👈 suivi par deployment_tracker
             abi=data.abi,
             contract_type="erc20",
             created_at=datetime.utcnow(),
         )
         await record.insert()
+        await register_deployment(str(record.id), record.chain, record.contract_address, record.abi)
 
         print(f"✅ Deployment saved on {data.chain}: {data.contract_address}")
 
@@ -110,7 +141,7 @@ async def record_deployment(data: DeploymentRecord):
 
 
 
-@router.get("/byUser/{user_address}")
+@router.get("/byUser/{user_address}", dependencies=[Depends(rate_limit("deploy.by_user", cost=3))])
 async def get_deployments_by_user(
     user_address: str,
     network: str = Query("anvil"),
@@ -120,22 +151,22 @@ async def get_deployments_by_user(
         user_address = user_address.lower()
         network = network.lower()
 
-        # 🧱 MongoDB
-        # Dans ton endpoint GET /byUser/{user_address}
-        deployments = await Deployment.find(
-            Deployment.user_id == user_address,
-            Deployment.chain == network # 👈 Ajoute ce filtre
-        ).to_list()
+        # 🧱 MongoDB — documents bruts : pas de validation Beanie ni de
+        # jsonable_encoder, encodés une seule fois par orjson
+        deployments = await Deployment.get_motor_collection().find({
+            "user_id": user_address,
+            "chain": network,
+        }).to_list(length=None)
 
         # 🏠 LOCAL / ANVIL → PAS d’Etherscan
         if network in {"anvil", "local", "localhost"}:
-            return {
+            return FastJSONResponse({
                 "address": user_address,
                 "network": network,
                 "balance": None,
                 "deployments": deployments,
                 "transactions": [],
-            }
+            })
 
         # 🌍 Réseaux supportés Etherscan
         if network not in {"sepolia", "ethereum", "polygon", "bsc", "avalanche"}:
@@ -147,23 +178,23 @@ async def get_deployments_by_user(
         # 💰 Balance
         balance = await get_wallet_balance(
             user_address=user_address,
-            api_key=settings.ETHERSCAN_API_KEY,
+            api_key=settings.ETHERSCAN_KEY,
             network=network,
         )
 
-        # 🔄 Transactions
-        transactions = await get_wallet_activity(
+        # 🔄 Transactions (étiquetées : méthode + arguments décodés)
+        transactions = abi_index.label_txs(await get_wallet_activity(
             user_address=user_address,
             network=network,
-        )
+        ), network)
 
-        return {
+        return FastJSONResponse({
             "address": user_address,
             "network": network,
             "balance": balance,
             "deployments": deployments,
             "transactions": transactions,
-        }
+        })
 
     except HTTPException:
         raise
@@ -174,9 +205,37 @@ async def get_deployments_by_user(
 
 @router.get("/contract/{address}")
 async def get_contract(address: str):
-    contract = await Deployment.find_one(
-        Deployment.contract_address == address
+    contract = await Deployment.get_motor_collection().find_one(
+        {"contract_address": address}
     )
     if not contract:
         raise HTTPException(404, "Contract not found")
-    return contract
+    return FastJSONResponse(contract)
+
+
+@router.get("/status/stream")
+async def stream_deployment_status(
+    user_id: str | None = Query(None, description="adresse du wallet"),
+    ids: str | None = Query(None, description="ids de déploiement, séparés par des virgules"),
+):
+    """
+    Server-Sent Events : état courant puis chaque transition
+    (pending → included → confirmed / failed / reorged). Remplace le
+    polling de receipts côté frontend.
+    """
+    if not user_id and not ids:
+        raise HTTPException(400, "user_id or ids is required")
+    id_set = {i.strip() for i in ids.split(",") if i.strip()} if ids else None
+    return StreamingResponse(
+        status_events(user_id.lower() if user_id else None, id_set),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/status/{deployment_id}")
+async def get_deployment_status(deployment_id: str):
+    statuses = await current_statuses(ids={deployment_id})
+    if not statuses:
+        raise HTTPException(404, "Deployment not found")
+    return statuses[0]
@@ -0,0 +1,83 @@
+# app/api/routes_export.py
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from eth_utils import is_address
+
+from app.api.services import exporter
+from app.api.services.token_holders import sync_token
+from app.db.models.token_holder import TokenSyncState
+from app.utils.etherscan_utils import LOCAL_NETWORKS, ETHERSCAN_API_BASE
+from app.utils.rpc_utils import NETWORK_RPC
+
+router = APIRouter()
+
+ExportFormat = Literal["ndjson", "csv"]
+
+
+def _stream(batches, fmt: ExportFormat, fields: list[str], filename: str) -> StreamingResponse:
+    if fmt == "csv":
+        body, media_type = exporter.encode_csv(batches, fields), "text/csv"
+    else:
+        body, media_type = exporter.encode_ndjson(batches), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@router.get("/contract/{address}/events")
+async def export_contract_events(
+    address: str,
+    network: str = Query("anvil"),
+    format: ExportFormat = Query("ndjson"),
+    from_block: int = Query(0, ge=0),
+    to_block: Optional[int] = Query(None, ge=0),
+    source: Literal["auto", "db", "chain"] = Query("auto"),
+):
+    """
+    Transfer d'un contrat en flux. `auto` lit l'index Mongo si le token est
+    déjà indexé (après rattrapage incrémental), sinon la chaîne par plages.
+    """
+    network = network.lower()
+    if not is_address(address):
+        raise HTTPException(400, "Invalid contract address")
+    if network not in NETWORK_RPC:
+        raise HTTPException(400, f"Unsupported network: {network}")
+
+    if source == "auto":
+        state = await TokenSyncState.find_one(
+            TokenSyncState.chain == network,
+            TokenSyncState.token == address.lower(),
+        )
+        source = "db" if state else "chain"
+        if state:
+            await sync_token(network, address)
+
+    if source == "db":
+        batches = exporter.contract_events_from_db(network, address, from_block, to_block)
+    else:
+        batches = exporter.contract_events_from_chain(network, address, from_block, to_block)
+
+    return _stream(batches, format, exporter.EVENT_FIELDS, f"{address.lower()}-{network}-events")
+
+
+@router.get("/wallet/{address}/activity")
+async def export_wallet_activity(
+    address: str,
+    network: str = Query("sepolia"),
+    format: ExportFormat = Query("ndjson"),
+    from_block: int = Query(0, ge=0),
+    to_block: Optional[int] = Query(None, ge=0),
+):
+    """Transactions d'un wallet (explorer txlist) en flux, paginées par bloc."""
+    network = network.lower()
+    if not is_address(address):
+        raise HTTPException(400, "Invalid wallet address")
+    if network in LOCAL_NETWORKS or network not in ETHERSCAN_API_BASE:
+        raise HTTPException(400, f"Unsupported network for explorer export: {network}")
+
+    batches = exporter.wallet_activity_from_explorer(network, address, from_block, to_block)
+    return _stream(batches, format, exporter.WALLET_FIELDS, f"{address.lower()}-{network}-activity")
@@ -0,0 +1,25 @@
+# app/api/routes_metrics.py
+import os
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+
+router = APIRouter()
+
+
+def _registry():
+    # Multi-workers : chaque process écrit ses métriques dans
+    # PROMETHEUS_MULTIPROC_DIR, l'exposition les agrège toutes
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return None
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Exposition Prometheus (latences par route, upstreams, caches, lag du loop)."""
+    registry = _registry()
+    data = generate_latest(registry) if registry else generate_latest()
+    return Response(data, media_type=CONTENT_TYPE_LATEST)
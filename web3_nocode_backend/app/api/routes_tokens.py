@@ -0,0 +1,177 @@
+# app/api/routes_tokens.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from eth_utils import is_address, to_checksum_address
+
+from app.api.rate_limit import rate_limit
+from app.api.services.airdrop import (
+    DEFAULT_MAX_BATCH_GAS,
+    READ_CHUNK_BYTES,
+    csv_rows,
+    file_chunks,
+    json_array_rows,
+    ndjson_rows,
+    prepare_airdrop,
+    spool_body,
+)
+from app.api.services.token_holders import SyncInProgress, balance_at, schedule_sync, sync_token, top_holders
+from app.core.responses import dumps
+from app.db.models.token_holder import TokenSyncState
+
+router = APIRouter()
+
+
+async def _sync_state(address: str, network: str, refresh: bool) -> TokenSyncState | None:
+    """
+    Curseur de sync du token. Par défaut l'index est lu tel quel et rattrapé
+    en tâche de fond ; refresh=true attend le rattrapage (RPC, bail de sync du token).
+    """
+    if not is_address(address):
+        raise HTTPException(400, "Invalid token address")
+
+    if not refresh:
+        state = await TokenSyncState.find_one(
+            TokenSyncState.chain == network.lower(),
+            TokenSyncState.token == address.lower(),
+        )
+        if state is not None:
+            schedule_sync(state)
+        return state
+
+    try:
+        return await sync_token(network, address)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except SyncInProgress as e:
+        raise HTTPException(409, str(e))
+    except Exception as e:
+        print(f"❌ Token sync error ({network} {address}): {e}")
+        raise HTTPException(502, f"Blockchain Error: {str(e)}")
+
+
+@router.post("/{address}/sync")
+async def sync_holders(address: str, network: str = Query("anvil")):
+    """Indexe les Transfer depuis le dernier bloc traité (gère les reorgs)."""
+    state = await _sync_state(address, network, True)
+    return {
+        "token": to_checksum_address(address),
+        "network": network,
+        "last_block": state.last_block,
+        "holder_count": state.holder_count,
+    }
+
+
+@router.get("/{address}/holders/top")
+async def get_top_holders(
+    address: str,
+    network: str = Query("anvil"),
+    n: int = Query(20, ge=1, le=1000),
+    refresh: bool = Query(False),
+):
+    state = await _sync_state(address, network, refresh)
+    holders = await top_holders(network, address, n)
+    return {
+        "token": to_checksum_address(address),
+        "network": network,
+        "last_block": state.last_block if state else None,
+        "holders": [
+            {
+                "address": to_checksum_address(h.holder),
+                "balance": h.balance,
+                "updated_block": h.updated_block,
+            }
+            for h in holders
+        ],
+    }
+
+
+@router.get("/{address}/holders/count")
+async def get_holder_count(
+    address: str,
+    network: str = Query("anvil"),
+    refresh: bool = Query(False),
+):
+    state = await _sync_state(address, network, refresh)
+    return {
+        "token": to_checksum_address(address),
+        "network": network,
+        "last_block": state.last_block if state else None,
+        "holder_count": state.holder_count if state else 0,
+    }
+
+
+@router.get("/{address}/balance/{holder}")
+async def get_balance_at_block(
+    address: str,
+    holder: str,
+    network: str = Query("anvil"),
+    block: int | None = Query(None, ge=0),
+    refresh: bool = Query(False),
+):
+    if not is_address(holder):
+        raise HTTPException(400, "Invalid holder address")
+
+    state = await _sync_state(address, network, refresh)
+    balance = await balance_at(network, address, holder, block)
+    return {
+        "token": to_checksum_address(address),
+        "holder": to_checksum_address(holder),
+        "network": network,
+        "block": block,
+        "last_block": state.last_block if state else None,
+        "balance": str(balance),
+    }
+
+
+@router.post(
+    "/{address}/airdrop/prepare",
+    dependencies=[Depends(rate_limit("tokens.airdrop_prepare", cost=10))],
+)
+async def prepare_airdrop_batches(
+    address: str,
+    request: Request,
+    batch_contract: str = Query(..., description="Adresse du contrat BatchTransfer déployé"),
+    decimals: int = Query(18, ge=0, le=36),
+    amount: str | None = Query(None, description="Montant par défaut (lignes sans montant)"),
+    max_gas: int = Query(DEFAULT_MAX_BATCH_GAS, ge=200_000, le=30_000_000),
+):
+    """
+    Découpe une liste de destinataires en lots batchTransferFrom prêts à signer.
+
+    Corps brut (recopié dans un fichier temporaire, MAX_BODY_BYTES max, puis lu en flux) :
+      - text/csv : `address,amount` par ligne (en-tête facultatif)
+      - application/x-ndjson : {"address": …, "amount": …} par ligne
+      - application/json : tableau des mêmes objets (décodé élément par élément)
+
+    Réponse NDJSON : lignes "invalid" et "batch" au fil de l'eau, puis un
+    "summary" contenant l'approve à envoyer avant le premier lot.
+    """
+    for value, label in ((address, "token"), (batch_contract, "batch contract")):
+        if not is_address(value):
+            raise HTTPException(400, f"Invalid {label} address")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        parse = json_array_rows
+    elif content_type in {"application/x-ndjson", "application/jsonl"}:
+        parse = ndjson_rows
+    elif content_type in {"text/csv", "text/plain", ""}:
+        parse = csv_rows
+    else:
+        raise HTTPException(415, f"Unsupported content type: {content_type}")
+
+    try:
+        spool = await spool_body(request.stream())
+    except ValueError as e:
+        raise HTTPException(413, str(e))
+    if parse is json_array_rows and not spool.read(READ_CHUNK_BYTES).lstrip().startswith(b"["):
+        spool.close()
+        raise HTTPException(400, "JSON body must be an array")
+    spool.seek(0)
+    rows = parse(file_chunks(spool))
+
+    async def body():
+        async for item in prepare_airdrop(rows, address, batch_contract, decimals, amount, max_gas):
+            yield dumps(item) + b"\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
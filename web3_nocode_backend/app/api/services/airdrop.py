@@ -0,0 +1,355 @@
+# app/api/services/airdrop.py
+"""
+Préparation d'airdrops ERC20 via le contrat BatchTransfer
+(app/api/contracts/batch_transfer.sol).
+
+La liste de destinataires est lue en flux (CSV, NDJSON ou tableau JSON), validée ligne à
+ligne, puis découpée en lots dont le gas estimé reste sous `max_gas`. Chaque
+lot est émis dès qu'il est plein : la mémoire dépend de la taille d'un lot,
+pas du nombre de destinataires (hors ensemble des adresses vues, 20 octets
+par destinataire, pour détecter les doublons).
+"""
+import re
+import tempfile
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+from eth_utils import keccak
+
+from app.utils.log_utils import checksum_address
+
+BATCH_TRANSFER_SELECTOR = keccak(text="batchTransferFrom(address,address[],uint256[])")[:4]
+APPROVE_SELECTOR = keccak(text="approve(address,uint256)")[:4]
+
+# ===== Modèle de gas (par lot) =====
+# Pas d'eth_estimateGas : il reverte tant que l'approve n'est pas miné.
+TX_BASE_GAS = 21_000
+BATCH_OVERHEAD_GAS = 30_000   # dispatch, boucle, event BatchSent
+GAS_PER_RECIPIENT = 35_000    # transferFrom vers un nouveau holder (SSTORE 0 → non-0, slots froids)
+DEFAULT_MAX_BATCH_GAS = 8_000_000
+MAX_RECIPIENTS = 250_000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+SPOOL_MEMORY_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+MAX_JSON_ITEM_BYTES = 64 * 1024   # un élément du tableau JSON, pas le tableau
+
+_WORD = 32
+_ZERO_WORD = bytes(_WORD)
+_UINT256_MAX = 2**256 - 1
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+# ===== Validation =====
+def parse_address(text: str) -> bytes:
+    """'0x…' → 20 octets ; la casse mixte doit être un checksum EIP-55 valide."""
+    text = text.strip().strip('"')
+    if len(text) != 42 or not text.startswith(("0x", "0X")):
+        raise InvalidRow("invalid address")
+    hex_part = text[2:]
+    try:
+        raw = bytes.fromhex(hex_part)
+    except ValueError:
+        raise InvalidRow("invalid address")
+    # keccak seulement si la casse porte un checksum à vérifier
+    if hex_part != hex_part.lower() and hex_part != hex_part.upper() and checksum_address(raw) != text:
+        raise InvalidRow("bad EIP-55 checksum")
+    if raw == bytes(20):
+        raise InvalidRow("zero address")
+    return raw
+
+
+def parse_amount(text: Any, decimals: int) -> int:
+    """Montant en unités du token ('1.5') → unités de base (int)."""
+    try:
+        value = Decimal(str(text).strip().strip('"'))
+        if not value.is_finite():
+            # Infinity / NaN : int() lèverait OverflowError / ValueError en plein flux
+            raise InvalidRow("invalid amount")
+        value = value.scaleb(decimals)
+    except ArithmeticError:  # InvalidOperation, Overflow (exposant hors contexte)
+        raise InvalidRow("invalid amount")
+    if value != value.to_integral_value():
+        raise InvalidRow(f"more than {decimals} decimals")
+    # bornes vérifiées en Decimal : int("1e900000") coûterait un entier géant
+    if value <= 0 or value > _UINT256_MAX:
+        raise InvalidRow("amount out of range")
+    return int(value)
+
+
+# ===== Lecture en flux =====
+async def spool_body(chunks: AsyncIterator[bytes], max_bytes: int = MAX_BODY_BYTES):
+    """
+    Recopie le corps de la requête dans un fichier temporaire (RAM jusqu'à
+    1 Mo, disque au-delà), comme UploadFile : le corps ne peut pas être lu
+    depuis le générateur d'une StreamingResponse, qui écoute déjà `receive`
+    pour détecter la déconnexion du client.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise ValueError(f"Body too large (max {max_bytes} bytes)")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def file_chunks(spool) -> AsyncIterator[bytes]:
+    try:
+        while chunk := spool.read(READ_CHUNK_BYTES):
+            yield chunk
+    finally:
+        spool.close()
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, List[str]]]:
+    """(n° de ligne, champs) ; une ligne d'en-tête éventuelle est ignorée."""
+    number = 0
+    async for line in _lines(chunks):
+        number += 1
+        text = line.decode("utf-8-sig", errors="replace").strip()
+        if not text:
+            continue
+        fields = [f.strip() for f in text.replace(";", ",").split(",")]
+        if number == 1 and not fields[0].strip('"').lower().startswith("0x"):
+            continue  # en-tête "address,amount"
+        yield number, fields
+
+
+async def ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, List[Any]]]:
+    """Une entrée par ligne : {"address": …, "amount": …} ou ["0x…", "1.5"]."""
+    number = 0
+    async for line in _lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            item = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield number, [line.decode(errors="replace")[:100], None, "invalid JSON"]
+            continue
+        yield number, _fields(item)
+
+
+_JSON_TOKENS = re.compile(rb'["\\{}\[\],]')
+
+
+def _json_item(number: int, raw: bytes) -> Tuple[int, List[Any]]:
+    try:
+        return number, _fields(orjson.loads(raw))
+    except orjson.JSONDecodeError:
+        return number, [raw.decode(errors="replace").strip()[:100], None, "invalid JSON"]
+
+
+async def json_array_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, List[Any]]]:
+    """
+    Tableau JSON lu en flux : les éléments de premier niveau sont découpés
+    (profondeur, chaînes, échappements) puis décodés un par un ; n° de ligne
+    = rang dans le tableau. Seul l'élément en cours est en mémoire.
+    """
+    depth = 0
+    in_string = False
+    skip_at = -1              # position de l'octet échappé par un "\"
+    offset = 0                # position du chunk courant dans le corps
+    item = bytearray()
+    number = 0
+    closed = False
+    async for chunk in chunks:
+        start = 0 if depth else len(chunk)
+        for match in _JSON_TOKENS.finditer(chunk):
+            i = match.start()
+            if offset + i == skip_at or closed:
+                continue
+            token = chunk[i:i + 1]
+            if in_string:
+                if token == b'"':
+                    in_string = False
+                elif token == b"\\":
+                    skip_at = offset + i + 1
+                continue
+            if token == b'"':
+                in_string = True
+            elif token in (b"{", b"["):
+                depth += 1
+                if depth == 1:
+                    start = i + 1  # ouverture du tableau (la route a vérifié le "[")
+            elif token in (b"}", b"]") or (token == b"," and depth == 1):
+                if token != b"," and depth > 1:
+                    depth -= 1
+                    continue
+                item += chunk[start:i]
+                if token == b"]":
+                    depth, closed = 0, True
+                if item.strip() or token == b",":
+                    number += 1
+                    yield _json_item(number, bytes(item))
+                item.clear()
+                start = i + 1
+        if depth:
+            item += chunk[start:]
+            if len(item) > MAX_JSON_ITEM_BYTES:
+                yield number + 1, [bytes(item[:100]).decode(errors="replace"), None, "JSON item too large"]
+                return
+        offset += len(chunk)
+    if not closed:
+        yield number + 1, ["", None, "unterminated JSON array"]
+
+
+def _fields(item: Any) -> List[Any]:
+    if isinstance(item, dict):
+        return [item.get("address", ""), item.get("amount")]
+    if isinstance(item, (list, tuple)):
+        return list(item[:2])
+    return [str(item)]
+
+
+# ===== Encodage =====
+def _word(value: int) -> bytes:
+    return value.to_bytes(_WORD, "big")
+
+
+def encode_batch(token: bytes, recipients: List[bytes], amounts: List[int]) -> bytes:
+    """batchTransferFrom(token, recipients, amounts) encodé à la main (ABI v2)."""
+    n = len(recipients)
+    offset_amounts = 3 * _WORD + _WORD + n * _WORD
+    return b"".join((
+        BATCH_TRANSFER_SELECTOR,
+        _ZERO_WORD[:12] + token,
+        _word(3 * _WORD),
+        _word(offset_amounts),
+        _word(n),
+        b"".join(_ZERO_WORD[:12] + r for r in recipients),
+        _word(n),
+        b"".join(_word(a) for a in amounts),
+    ))
+
+
+def encode_approve(spender: bytes, amount: int) -> bytes:
+    return APPROVE_SELECTOR + _ZERO_WORD[:12] + spender + _word(amount)
+
+
+def calldata_gas(data: bytes) -> int:
+    zeros = data.count(0)
+    return 4 * zeros + 16 * (len(data) - zeros)
+
+
+def _recipient_gas(recipient: bytes, amount: int) -> int:
+    # les deux mots ABI du destinataire + son transferFrom
+    return calldata_gas(recipient) + 12 * 4 + calldata_gas(_word(amount)) + GAS_PER_RECIPIENT
+
+
+# ===== Préparation =====
+async def prepare_airdrop(
+    rows: AsyncIterator[Tuple[int, List[Any]]],
+    token: str,
+    batch_contract: str,
+    decimals: int = 18,
+    default_amount: Optional[str] = None,
+    max_gas: int = DEFAULT_MAX_BATCH_GAS,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Émet, dans l'ordre : des lignes {"type": "invalid"} au fil de l'eau,
+    un {"type": "batch"} par lot plein, puis un {"type": "summary"} avec
+    l'approve à signer en premier (montant total).
+    """
+    token_raw, contract_raw = parse_address(token), parse_address(batch_contract)
+    fixed_gas = TX_BASE_GAS + BATCH_OVERHEAD_GAS + calldata_gas(encode_batch(token_raw, [], []))
+    if max_gas <= fixed_gas + GAS_PER_RECIPIENT * 2:
+        raise ValueError(f"max_gas too low (min {fixed_gas + GAS_PER_RECIPIENT * 2})")
+
+    seen: set[bytes] = set()
+    recipients: List[bytes] = []
+    amounts: List[int] = []
+    lines: List[int] = []
+    gas = fixed_gas
+    stats = {"batches": 0, "recipients": 0, "invalid": 0, "total": 0, "gas": 0}
+
+    def flush() -> Dict[str, Any]:
+        data = encode_batch(token_raw, recipients, amounts)
+        batch_total = sum(amounts)
+        item = {
+            "type": "batch",
+            "index": stats["batches"],
+            "to": checksum_address(contract_raw),
+            "data": "0x" + data.hex(),
+            "recipients": len(recipients),
+            "first_line": lines[0],
+            "last_line": lines[-1],
+            "total_amount": str(batch_total),
+            "gas_estimate": gas,
+        }
+        stats["batches"] += 1
+        stats["total"] += batch_total
+        stats["gas"] += gas
+        return item
+
+    async for number, fields in rows:
+        try:
+            if len(fields) > 2 and fields[2]:
+                raise InvalidRow(fields[2])
+            recipient = parse_address(str(fields[0]))
+            raw_amount = fields[1] if len(fields) > 1 and fields[1] not in (None, "") else default_amount
+            if raw_amount is None:
+                raise InvalidRow("missing amount")
+            amount = parse_amount(raw_amount, decimals)
+            if recipient in seen:
+                raise InvalidRow("duplicate recipient")
+        except InvalidRow as e:
+            stats["invalid"] += 1
+            yield {"type": "invalid", "line": number, "value": str(fields[0])[:100], "error": str(e)}
+            continue
+
+        if stats["recipients"] >= MAX_RECIPIENTS:
+            # réponse déjà en cours de flux : plus possible de renvoyer un 413
+            yield {"type": "error", "line": number, "error": f"Too many recipients (max {MAX_RECIPIENTS})"}
+            return
+        seen.add(recipient)
+        stats["recipients"] += 1
+
+        cost = _recipient_gas(recipient, amount)
+        if recipients and gas + cost > max_gas:
+            yield flush()
+            recipients, amounts, lines, gas = [], [], [], fixed_gas
+        recipients.append(recipient)
+        amounts.append(amount)
+        lines.append(number)
+        gas += cost
+
+    if recipients:
+        yield flush()
+
+    yield {
+        "type": "summary",
+        "token": checksum_address(token_raw),
+        "batch_contract": checksum_address(contract_raw),
+        "batches": stats["batches"],
+        "recipients": stats["recipients"],
+        "invalid": stats["invalid"],
+        "total_amount": str(stats["total"]),
+        "gas_estimate_total": stats["gas"],
+        # à signer avant les lots : autorise BatchTransfer à dépenser le total
+        "approve": {
+            "to": checksum_address(token_raw),
+            "data": "0x" + encode_approve(contract_raw, stats["total"]).hex(),
+        },
+    }
@@ -0,0 +1,250 @@
+# app/api/services/artifact_bundle.py
+"""
+Bundle d'artefacts pré-compilés : ABI + bytecode de tous les contrats de
+app/api/contracts/*.sol dans un seul fichier, lu via mmap au démarrage.
+En production, solc n'est plus sur le chemin chaud (ni même nécessaire).
+
+Format (version 1, little-endian) :
+
+    0   8 o   magic b"W3FBNDL\\0"
+    8   2 o   version du format (uint16)
+    10  4 o   taille du manifeste (uint32)
+    14  n o   manifeste JSON
+    ... 0-7 o de padding (blobs alignés sur 8)
+    ...       blobs : ABI (JSON) et bytecode (binaire brut), bout à bout
+
+Manifeste :
+
+    {"format": 1, "solc": "0.8.20", "settings_sha256": "…", "built_at": "…",
+     "blobs_sha256": "…",
+     "files": {"hello.sol": {"source_sha256": "…", "contracts": {
+         "Hello": {"abi": [offset, taille], "bytecode": [offset, taille],
+                   "metadata_sha256": "…"}}}}}
+
+Un fichier dont le sha256 du source ne correspond plus (ou un bundle
+construit avec un autre solc / d'autres réglages) retombe sur la
+compilation à la demande.
+
+    python -m app.api.services.artifact_bundle build [--output PATH]
+    python -m app.api.services.artifact_bundle inspect [PATH]
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+from app.api.services.solidity_compiler import CONTRACTS_DIR, SOLC_SETTINGS, SOLC_VERSION
+from app.config.settings import settings
+
+MAGIC = b"W3FBNDL\0"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHI")
+_ALIGN = 8
+
+
+def settings_fingerprint() -> str:
+    """Version de solc + réglages : un changement invalide tout le bundle."""
+    payload = orjson.dumps({"solc": SOLC_VERSION, "settings": SOLC_SETTINGS}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# ===== Lecture =====
+class ArtifactBundle:
+    """Bundle ouvert en lecture seule ; les blobs restent dans le mmap (page cache partagé entre workers)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, manifest_len = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not an artifact bundle: {path}")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported bundle format v{version} (expected v{FORMAT_VERSION})")
+            end = _HEADER.size + manifest_len
+            self.manifest: Dict[str, Any] = orjson.loads(self._mmap[_HEADER.size:end])
+        except Exception:
+            self._mmap.close()
+            raise
+        self._blobs = -(-end // _ALIGN) * _ALIGN
+
+    def _blob(self, span: list) -> bytes:
+        offset, size = span
+        start = self._blobs + offset
+        return self._mmap[start:start + size]
+
+    @property
+    def compatible(self) -> bool:
+        return self.manifest.get("settings_sha256") == settings_fingerprint()
+
+    def contracts(self, file_name: str, source_sha256: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Contrats d'un fichier, au format de sortie solc (abi, evm.bytecode.object),
+        ou None si absent / source modifié depuis le build.
+        """
+        entry = self.manifest["files"].get(file_name)
+        if entry is None or entry["source_sha256"] != source_sha256 or not self.compatible:
+            return None
+        contracts = {}
+        for name, spans in entry["contracts"].items():
+            abi_json = self._blob(spans["abi"])
+            contracts[name] = {
+                "abi": orjson.loads(abi_json),
+                "abi_json": abi_json,
+                "evm": {"bytecode": {"object": self._blob(spans["bytecode"]).hex()}},
+                "metadata_sha256": spans.get("metadata_sha256"),
+            }
+        return contracts
+
+    def verify(self) -> bool:
+        return _sha256(self._mmap[self._blobs:]) == self.manifest.get("blobs_sha256")
+
+    def close(self):
+        self._mmap.close()
+
+
+_bundle: Optional[ArtifactBundle] = None
+
+
+def load_bundle(path: Optional[str] = None) -> Optional[ArtifactBundle]:
+    """
+    Ouvre le bundle (démarrage) et signale les sources qui ont changé depuis
+    le build : ceux-là seront compilés à la première demande.
+    """
+    global _bundle
+    path = Path(path or settings.ARTIFACT_BUNDLE_PATH)
+    if not path.is_file():
+        print(f"⚠️ No artifact bundle at {path}: contracts will be compiled on demand")
+        return None
+    try:
+        bundle = ArtifactBundle(path)
+    except Exception as e:
+        print(f"❌ Invalid artifact bundle {path}: {e}")
+        return None
+
+    if not bundle.compatible:
+        print(f"⚠️ Artifact bundle {path} built for another solc/settings: ignored")
+    else:
+        files = bundle.manifest["files"]
+        stale = [
+            name for name, entry in files.items()
+            if not (CONTRACTS_DIR / name).is_file()
+            or _sha256((CONTRACTS_DIR / name).read_text().encode()) != entry["source_sha256"]
+        ]
+        missing = sorted(p.name for p in CONTRACTS_DIR.glob("*.sol") if p.name not in files)
+        print(f"📦 Artifact bundle loaded: {len(files) - len(stale)} files")
+        if stale or missing:
+            print(f"⚠️ Not in bundle or changed since build (compiled on demand): {sorted(stale) + missing}")
+
+    if _bundle is not None:
+        _bundle.close()
+    _bundle = bundle
+    return bundle
+
+
+def close_bundle():
+    global _bundle
+    if _bundle is not None:
+        _bundle.close()
+        _bundle = None
+
+
+def bundled_contracts(contract_path: Path, source_sha256: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Appelé par compile_contract sur défaut de cache ; seuls les contrats fournis sont bundlés."""
+    if _bundle is None or contract_path.resolve().parent != CONTRACTS_DIR:
+        return None
+    return _bundle.contracts(contract_path.name, source_sha256)
+
+
+# ===== Construction (CLI) =====
+def build_bundle(output: Path) -> Dict[str, Any]:
+    from app.api.services.solidity_compiler import _compile_file
+
+    blobs = bytearray()
+
+    def add_blob(data: bytes) -> list:
+        span = [len(blobs), len(data)]
+        blobs.extend(data)
+        blobs.extend(b"\0" * (-len(blobs) % _ALIGN))
+        return span
+
+    files: Dict[str, Any] = {}
+    for path in sorted(CONTRACTS_DIR.glob("*.sol")):
+        source = path.read_text()
+        compiled = _compile_file(path, source)
+        contracts = {}
+        for name, output_ in sorted(compiled.items()):
+            bytecode = output_["evm"]["bytecode"]["object"]
+            if not bytecode:
+                continue  # interfaces / contrats abstraits : rien à déployer
+            contracts[name] = {
+                "abi": add_blob(orjson.dumps(output_["abi"])),
+                "bytecode": add_blob(bytes.fromhex(bytecode.removeprefix("0x"))),
+                "metadata_sha256": _sha256(output_.get("metadata", "").encode()),
+            }
+        files[path.name] = {"source_sha256": _sha256(source.encode()), "contracts": contracts}
+        print(f"✅ {path.name}: {', '.join(contracts) or '-'}")
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "solc": SOLC_VERSION,
+        "settings_sha256": settings_fingerprint(),
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "blobs_sha256": _sha256(bytes(blobs)),
+        "files": files,
+    }
+    manifest_json = orjson.dumps(manifest)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(manifest_json)) + manifest_json
+    header += b"\0" * (-len(header) % _ALIGN)
+
+    # écriture atomique : un worker qui démarre ne lit jamais un bundle à moitié écrit
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    tmp.write_bytes(header + blobs)
+    os.replace(tmp, output)
+    return manifest
+
+
+def _inspect(path: Path) -> int:
+    bundle = ArtifactBundle(path)
+    try:
+        m = bundle.manifest
+        print(f"{path}: format v{m['format']}, solc {m['solc']}, built {m['built_at']}, {path.stat().st_size} bytes")
+        print(f"  settings: {'ok' if bundle.compatible else 'MISMATCH'} ; blobs: {'ok' if bundle.verify() else 'CORRUPTED'}")
+        for name, entry in m["files"].items():
+            source = CONTRACTS_DIR / name
+            current = source.is_file() and _sha256(source.read_text().encode()) == entry["source_sha256"]
+            print(f"  {name:<28} {'ok   ' if current else 'stale'} {', '.join(entry['contracts'])}")
+        return 0 if bundle.compatible and bundle.verify() else 1
+    finally:
+        bundle.close()
+
+
+if __name__ == "__main__":
+    # Build d'image (après `solidity_compiler install`) :
+    #   python -m app.api.services.artifact_bundle build
+    parser = argparse.ArgumentParser(prog="python -m app.api.services.artifact_bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="compile app/api/contracts/*.sol into a bundle")
+    build_cmd.add_argument("--output", default=settings.ARTIFACT_BUNDLE_PATH)
+    inspect_cmd = commands.add_parser("inspect", help="show a bundle manifest and check it")
+    inspect_cmd.add_argument("path", nargs="?", default=settings.ARTIFACT_BUNDLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build_bundle(Path(args.output))
+        print(f"📦 {args.output}: {len(manifest['files'])} files")
+    else:
+        sys.exit(_inspect(Path(args.path)))
@@ -0,0 +1,61 @@
+# app/api/services/contract_index.py
+"""
+Alimente l'index ABI (app/utils/abi_index.py) : chargement complet au
+démarrage, puis un déploiement à la fois. Un nouveau déploiement est
+publié sur Redis pour que chaque worker mette son index à jour.
+"""
+from contextlib import suppress
+from typing import Any, Dict, List
+
+from bson import ObjectId
+
+from app.core.redis_client import get_redis
+from app.db.models.deployment import Deployment
+from app.utils.abi_index import abi_index
+
+INDEX_CHANNEL = "abi_index:deployments"
+_PROJECTION = {"chain": 1, "contract_address": 1, "abi": 1}
+
+
+def _add(doc: Dict[str, Any]):
+    if doc.get("chain") and doc.get("contract_address") and doc.get("abi"):
+        try:
+            abi_index.add_contract(doc["chain"], doc["contract_address"], str(doc["_id"]), doc["abi"])
+        except Exception as e:
+            print(f"⚠️ ABI index: skipping deployment {doc['_id']}: {e}")
+
+
+async def build_abi_index():
+    cursor = Deployment.get_motor_collection().find(
+        {"contract_address": {"$ne": None}}, projection=_PROJECTION, batch_size=500,
+    )
+    async for doc in cursor:
+        _add(doc)
+    print("🗂️ ABI index:", abi_index.stats())
+
+
+async def register_deployment(deployment_id: str, chain: str, contract_address: str | None, abi: List[Dict[str, Any]]):
+    """Indexe localement puis notifie les autres workers."""
+    _add({"_id": deployment_id, "chain": chain, "contract_address": contract_address, "abi": abi})
+    try:
+        await get_redis().publish(INDEX_CHANNEL, deployment_id)
+    except Exception as e:
+        print(f"⚠️ ABI index: publish failed: {e}")
+
+
+async def run_index_sync():
+    """Tâche de fond (chaque worker) : indexe les déploiements annoncés par les autres."""
+    pubsub = get_redis().pubsub()
+    await pubsub.subscribe(INDEX_CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            if message["type"] != "message" or not ObjectId.is_valid(message["data"]):
+                continue
+            doc = await Deployment.get_motor_collection().find_one(
+                {"_id": ObjectId(message["data"])}, projection=_PROJECTION,
+            )
+            if doc:
+                _add(doc)  # idempotent : le worker émetteur l'a déjà
+    finally:
+        with suppress(Exception):
+            await pubsub.aclose()
@@ -0,0 +1,306 @@
+# app/api/services/deployment_tracker.py
+"""
+Suivi des déploiements jusqu'à confirmation, résistant aux reorgs.
+
+Un seul worker (leader, bail Redis) traite les nouveaux blocs annoncés par
+le suiveur de têtes (head_follower) ; à chaque nouveau bloc d'un réseau, les receipts de *tous* les déploiements non
+finalisés de ce réseau sont lus en batch JSON-RPC :
+
+    pending ──► included ──► confirmed (confirmations >= profondeur réseau)
+       │           │  ▲
+       │           ▼  │ re-miné
+       │        reorged (bloc orphelin)
+       ▼
+    failed (receipt status 0, ou tx jamais (re-)minée après PENDING_TIMEOUT)
+
+Chaque transition est publiée sur Redis pub/sub ; chaque worker la relaie
+aux clients abonnés en SSE (StatusHub).
+"""
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.api.services.head_follower import RECONNECT_MAX_DELAY, head_follower
+from app.core.leader import LeaderLease
+from app.core.redis_client import get_redis
+from app.db.models.deployment import Deployment
+from app.utils.rpc_utils import NETWORK_RPC, RpcItemError, rpc_batch
+
+TRACKED_STATUSES = ["pending", "included", "reorged", "failed"]
+
+# confirmations avant de considérer un déploiement comme définitif
+CONFIRMATION_DEPTH = {
+    "anvil": 1,
+    "sepolia": 3,
+    "ethereum": 12,
+    "polygon": 64,
+    "bsc": 15,
+    "avalanche": 1,
+}
+DEFAULT_CONFIRMATION_DEPTH = 12
+PENDING_TIMEOUT = timedelta(minutes=30)
+
+STATUS_CHANNEL = "deployments:status"
+_leader = LeaderLease("deployments:tracker:leader")
+_last_head: dict[str, int] = {}
+
+
+# ===== Machine à états =====
+def _next_state(doc: Dict[str, Any], receipt: Optional[Dict[str, Any]], head: int, depth: int, now: datetime) -> Dict[str, Any]:
+    """Nouvel état d'un déploiement à partir de son receipt brut (ou None)."""
+    state = {
+        "status": doc["status"],
+        "confirmations": doc.get("confirmations", 0),
+        "block_number": doc.get("block_number"),
+        "block_hash": doc.get("block_hash"),
+        "finalized": False,
+        "status_reason": doc.get("status_reason"),
+    }
+    if receipt is None:
+        if doc.get("block_hash"):
+            # était inclus, le bloc a été orphelin : la tx est retournée au mempool
+            state.update(status="reorged", confirmations=0, block_number=None,
+                         block_hash=None, status_reason="block orphaned")
+        elif doc["status"] == "pending" and now - doc.get("created_at", now) > PENDING_TIMEOUT:
+            state.update(status="failed", finalized=True, status_reason="dropped")
+        elif doc["status"] == "reorged" and now - (doc.get("status_updated_at") or doc.get("created_at", now)) > PENDING_TIMEOUT:
+            # orphelin jamais re-miné : délai compté depuis le reorg, pas la création
+            state.update(status="failed", finalized=True, status_reason="dropped")
+        return state
+
+    block_number = int(receipt["blockNumber"], 16)
+    confirmations = max(0, head - block_number + 1)
+    succeeded = int(receipt.get("status") or "0x1", 16) == 1
+    if succeeded:
+        status = "confirmed" if confirmations >= depth else "included"
+    else:
+        status = "failed"
+    state.update(
+        status=status,
+        confirmations=confirmations,
+        block_number=block_number,
+        block_hash=receipt["blockHash"],
+        finalized=confirmations >= depth,
+        status_reason=None if succeeded else "reverted",
+    )
+    return state
+
+
+def _event(doc: Dict[str, Any], state: Dict[str, Any], previous: str, depth: int) -> Dict[str, Any]:
+    return {
+        "id": str(doc["_id"]),
+        "user_id": doc.get("user_id"),
+        "chain": doc["chain"],
+        "contract_address": doc.get("contract_address"),
+        "tx_hash": doc.get("tx_hash"),
+        "previous_status": previous,
+        "status": state["status"],
+        "confirmations": state["confirmations"],
+        "required_confirmations": depth,
+        "block_number": state["block_number"],
+        "reason": state["status_reason"],
+    }
+
+
+async def process_block(network: str, head: int) -> List[Dict[str, Any]]:
+    """
+    Réévalue tous les déploiements non finalisés de `network` au bloc `head`
+    (eth_getTransactionReceipt en batch ; un receipt en erreur
+    est ignoré pour ce bloc, jamais pris pour une tx absente). Retourne les transitions publiées.
+    """
+    collection = Deployment.get_motor_collection()
+    docs = await collection.find(
+        {"chain": network, "finalized": {"$ne": True}, "status": {"$in": TRACKED_STATUSES}, "tx_hash": {"$ne": None}},
+        projection={"abi": 0},
+    ).to_list(length=None)
+    if not docs:
+        return []
+
+    receipts = await rpc_batch(network, "eth_getTransactionReceipt", [[d["tx_hash"]] for d in docs])
+    depth = CONFIRMATION_DEPTH.get(network.lower(), DEFAULT_CONFIRMATION_DEPTH)
+    now = datetime.utcnow()
+
+    ops, events = [], []
+    errors = 0
+    for doc, receipt in zip(docs, receipts):
+        if isinstance(receipt, RpcItemError):
+            # receipt inconnu (≠ absent) : on ne conclut rien, relu au prochain bloc
+            errors += 1
+            continue
+        state = _next_state(doc, receipt, head, depth, now)
+        previous = doc["status"]
+        if doc.get("block_hash") and receipt and receipt["blockHash"] != doc["block_hash"]:
+            # ré-inclus dans un autre bloc : le client voit passer le reorg
+            events.append(_event(doc, {**state, "status": "reorged", "status_reason": "block orphaned"}, previous, depth))
+            previous = "reorged"
+
+        changed = {k: v for k, v in state.items() if doc.get(k) != v}
+        if not changed:
+            continue
+        if "status" in changed:
+            changed["status_updated_at"] = now
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": changed}))
+        if "status" in changed or "confirmations" in changed:
+            events.append(_event(doc, state, previous, depth))
+
+    if errors:
+        print(f"⚠️ Deployment tracker: {errors}/{len(docs)} receipts unavailable on {network}, skipped")
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+    redis = get_redis()
+    for event in events:
+        await redis.publish(STATUS_CHANNEL, orjson.dumps(event))
+    return events
+
+
+async def _track_network(network: str):
+    head = await head_follower.head_number(network)
+    if _last_head.get(network) == head:
+        return  # pas de nouveau bloc : rien ne peut avoir changé
+    await process_block(network, head)
+    _last_head[network] = head
+
+
+async def _tick():
+    networks = await Deployment.get_motor_collection().distinct(
+        "chain", {"finalized": {"$ne": True}, "status": {"$in": TRACKED_STATUSES}},
+    )
+    networks = [n for n in networks if n and n.lower() in NETWORK_RPC]
+    results = await asyncio.gather(*(_track_network(n) for n in networks), return_exceptions=True)
+    for network, result in zip(networks, results):
+        if isinstance(result, Exception):
+            print(f"❌ Deployment tracker failed on {network}: {result}")
+
+
+async def run_tracker(interval: float = 2.0):
+    """Tâche de fond (chaque worker) : seul le détenteur du bail travaille."""
+    try:
+        while True:
+            try:
+                if await _leader.acquire_or_renew():
+                    await _tick()
+                else:
+                    _last_head.clear()  # un autre worker suit les têtes
+            except Exception as e:
+                print(f"❌ Deployment tracker tick failed: {e}")
+            await head_follower.wait(interval)  # réveillé dès qu'un bloc arrive
+    finally:
+        with suppress(Exception):
+            await _leader.release()
+
+
+# ===== Diffusion aux clients (par worker) =====
+class StatusHub:
+    """
+    Un abonnement Redis par worker, redistribué aux clients SSE locaux
+    (filtrés par utilisateur ou par ids de déploiement).
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscribers: dict[asyncio.Queue, tuple[Optional[str], Optional[set[str]]]] = {}
+
+    def subscribe(self, user_id: Optional[str] = None, ids: Optional[set[str]] = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.QUEUE_SIZE)
+        self._subscribers[queue] = (user_id, ids)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def dispatch(self, event: Dict[str, Any]):
+        for queue, (user_id, ids) in self._subscribers.items():
+            if user_id and event.get("user_id") != user_id:
+                continue
+            if ids and event["id"] not in ids:
+                continue
+            if queue.full():
+                queue.get_nowait()  # client lent : on sacrifie le plus ancien
+            queue.put_nowait(event)
+
+    async def run(self):
+        """
+        Tâche de fond (chaque worker), réabonnée avec backoff si Redis coupe
+        (même boucle que HeadFollower.run_subscriber) : sans elle les clients
+        SSE de ce worker ne reçoivent plus que des heartbeats.
+        """
+        delay = 1.0
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(STATUS_CHANNEL)
+                delay = 1.0
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.dispatch(orjson.loads(message["data"]))
+                    except Exception as e:
+                        print(f"⚠️ Status hub: skipping malformed status message: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Status hub subscription lost: {e} (retry in {delay:.0f}s)")
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+status_hub = StatusHub()
+
+
+async def current_statuses(user_id: Optional[str] = None, ids: Optional[set[str]] = None) -> List[Dict[str, Any]]:
+    query: Dict[str, Any] = {}
+    if user_id:
+        query["user_id"] = user_id
+    if ids:
+        query["_id"] = {"$in": [ObjectId(i) for i in ids if ObjectId.is_valid(i)]}
+    docs = await Deployment.get_motor_collection().find(
+        query,
+        projection={"user_id": 1, "chain": 1, "contract_address": 1, "tx_hash": 1, "status": 1,
+                    "confirmations": 1, "block_number": 1, "status_reason": 1},
+    ).to_list(length=None)
+    return [
+        {
+            "id": str(d["_id"]),
+            "user_id": d.get("user_id"),
+            "chain": d.get("chain"),
+            "contract_address": d.get("contract_address"),
+            "tx_hash": d.get("tx_hash"),
+            "status": d.get("status"),
+            "confirmations": d.get("confirmations", 0),
+            "required_confirmations": CONFIRMATION_DEPTH.get((d.get("chain") or "").lower(), DEFAULT_CONFIRMATION_DEPTH),
+            "block_number": d.get("block_number"),
+            "reason": d.get("status_reason"),
+        }
+        for d in docs
+    ]
+
+
+async def status_events(
+    user_id: Optional[str] = None,
+    ids: Optional[set[str]] = None,
+    heartbeat: float = 15.0,
+) -> AsyncIterator[bytes]:
+    """Flux SSE : état courant (snapshot) puis chaque transition."""
+    queue = status_hub.subscribe(user_id, ids)  # avant le snapshot : aucune transition perdue
+    try:
+        for status in await current_statuses(user_id, ids):
+            yield b"event: snapshot\ndata: " + orjson.dumps(status) + b"\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"  # garde la connexion ouverte derrière les proxies
+                continue
+            yield b"event: status\ndata: " + orjson.dumps(event) + b"\n\n"
+    finally:
+        status_hub.unsubscribe(queue)
@@ -0,0 +1,195 @@
+# app/api/services/exporter.py
+"""
+Exports en flux (NDJSON / CSV) : chaque source produit des lots de lignes
+bornés, encodés puis écrits au fil de l'eau. La mémoire dépend de la taille
+d'un lot, jamais de la taille totale de l'export.
+"""
+import csv
+import io
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from eth_utils import to_checksum_address
+
+from app.core.responses import dumps
+from app.db.models.event import Event
+from app.utils.etherscan_utils import get_wallet_activity
+from app.utils.log_fetcher import iter_logs
+from app.utils.log_utils import ERC20_TRANSFER_TOPIC, decode_transfer_logs
+from app.utils.rpc_utils import rpc
+
+EXPORT_BATCH_ROWS = 1_000       # lignes par lot (curseur Mongo / écriture)
+EXPLORER_PAGE_SIZE = 1_000      # txlist : offset max raisonnable chez Etherscan
+EXPLORER_MAX_RESULTS = 10_000   # Etherscan : page × offset plafonné
+
+EVENT_FIELDS = ["block_number", "log_index", "tx_hash", "event", "from", "to", "value"]
+WALLET_FIELDS = [
+    "blockNumber", "timeStamp", "hash", "from", "to", "value",
+    "gas", "gasPrice", "gasUsed", "isError", "methodId", "functionName",
+]
+
+Rows = AsyncIterator[List[Dict[str, Any]]]
+
+
+# ===== Sources =====
+async def contract_events_from_db(
+    network: str,
+    token: str,
+    from_block: int = 0,
+    to_block: Optional[int] = None,
+) -> Rows:
+    """Events indexés (cf. token_holders) lus par curseur Mongo, triés par bloc."""
+    block_filter: Dict[str, int] = {"$gte": from_block}
+    if to_block is not None:
+        block_filter["$lte"] = to_block
+
+    cursor = Event.get_motor_collection().find(
+        {"chain": network.lower(), "contract_address": token.lower(), "block_number": block_filter},
+        projection={"_id": 0, "block_number": 1, "log_index": 1, "tx_hash": 1, "event_name": 1, "args": 1},
+        sort=[("block_number", 1), ("log_index", 1)],
+        batch_size=EXPORT_BATCH_ROWS,
+    )
+    batch = []
+    async for doc in cursor:
+        args = doc.get("args") or {}
+        batch.append({
+            "block_number": doc["block_number"],
+            "log_index": doc.get("log_index"),
+            "tx_hash": doc["tx_hash"],
+            "event": doc["event_name"],
+            "from": args.get("from"),
+            "to": args.get("to"),
+            "value": args.get("value"),
+        })
+        if len(batch) >= EXPORT_BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def contract_events_from_chain(
+    network: str,
+    token: str,
+    from_block: int = 0,
+    to_block: Optional[int] = None,
+) -> Rows:
+    """Transfer lus directement on-chain (fenêtres adaptatives, cf. log_fetcher)."""
+    if to_block is None:
+        to_block = await rpc(network, "block_number")
+
+    address = to_checksum_address(token)
+    async with aclosing(iter_logs(network, address, [ERC20_TRANSFER_TOPIC], from_block, to_block)) as chunks:
+        async for logs in chunks:
+            yield [
+                {
+                    "block_number": row["block"],
+                    "log_index": row["log_index"],
+                    "tx_hash": row["tx_hash"],
+                    "event": "Transfer",
+                    "from": row["from"],
+                    "to": row["to"],
+                    "value": str(row["value"]),
+                }
+                for row in decode_transfer_logs(logs).rows()
+            ]
+
+
+async def wallet_activity_from_explorer(
+    network: str,
+    address: str,
+    from_block: int = 0,
+    to_block: Optional[int] = None,
+) -> Rows:
+    """
+    txlist paginé par bloc de départ (sort=asc) plutôt que par numéro de page :
+    Etherscan plafonne page × offset à 10 000 résultats. Seul un bloc qui
+    remplit une page entière est lu par numéro de page (startblock = endblock).
+    """
+    cursor = from_block
+    end = to_block if to_block is not None else 99999999
+    seen_at_cursor: set[str] = set()
+
+    while cursor <= end:
+        txs = await get_wallet_activity(
+            address,
+            network=network,
+            page=1,
+            offset=EXPLORER_PAGE_SIZE,
+            sort="asc",
+            startblock=cursor,
+            endblock=end,
+        )
+        fresh = [tx for tx in txs if tx.get("hash") not in seen_at_cursor]
+        if fresh:
+            yield [{field: tx.get(field) for field in WALLET_FIELDS} for tx in fresh]
+        if len(txs) < EXPLORER_PAGE_SIZE:
+            return
+
+        last_block = int(txs[-1]["blockNumber"])
+        if last_block == cursor:
+            # page entière dans un seul bloc : pages suivantes de ce bloc seul
+            seen = seen_at_cursor | {tx["hash"] for tx in txs}
+            async for batch in _single_block_pages(address, network, cursor, seen):
+                yield batch
+            cursor += 1
+            seen_at_cursor = set()
+        else:
+            # le dernier bloc peut être partiel : on le relit en sautant ce qui est déjà émis
+            cursor = last_block
+            seen_at_cursor = {tx["hash"] for tx in txs if int(tx["blockNumber"]) == last_block}
+
+
+async def _single_block_pages(address: str, network: str, block: int, seen: set[str]) -> Rows:
+    """Pages 2.. d'un bloc à plus de EXPLORER_PAGE_SIZE txs ; erreur plutôt qu'un export tronqué."""
+    page = 2
+    while True:
+        if page * EXPLORER_PAGE_SIZE > EXPLORER_MAX_RESULTS:
+            raise RuntimeError(f"Block {block} has more than {EXPLORER_MAX_RESULTS} txs for {address}: explorer cannot list them all")
+        txs = await get_wallet_activity(
+            address,
+            network=network,
+            page=page,
+            offset=EXPLORER_PAGE_SIZE,
+            sort="asc",
+            startblock=block,
+            endblock=block,
+        )
+        fresh = [tx for tx in txs if tx.get("hash") not in seen]
+        if fresh:
+            seen.update(tx["hash"] for tx in fresh)
+            yield [{field: tx.get(field) for field in WALLET_FIELDS} for tx in fresh]
+        if len(txs) < EXPLORER_PAGE_SIZE:
+            return
+        page += 1
+
+
+# ===== Encodeurs =====
+async def encode_ndjson(batches: Rows) -> AsyncIterator[bytes]:
+    try:
+        async for batch in batches:
+            yield b"".join(dumps(row) + b"\n" for row in batch)
+    except Exception as e:
+        # statut HTTP déjà envoyé : on signale l'erreur dans le flux
+        print(f"❌ Export interrupted: {e}")
+        yield dumps({"error": str(e)}) + b"\n"
+
+
+async def encode_csv(batches: Rows, fields: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    try:
+        async for batch in batches:
+            writer.writerows(batch)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate(0)
+    except Exception as e:
+        # pas de ligne d'erreur possible en CSV : on coupe le flux (chunk final
+        # jamais envoyé) pour que le client voie un transfert incomplet, pas un
+        # fichier tronqué qui a l'air entier
+        print(f"❌ Export interrupted: {e}")
+        raise
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,332 @@
+# app/api/services/head_follower.py
+"""
+Un seul suiveur de tête de chaîne par réseau, partagé par tout le cluster.
+
+Le worker leader (bail Redis) interroge chaque réseau suivi, lit les
+nouveaux en-têtes en un batch eth_getBlockByNumber et les publie sur
+Redis ; chaque worker les range dans un anneau des RING_SIZE derniers
+blocs (hash, parent, logsBloom) et réveille ses consommateurs locaux :
+
+    nœud RPC ──► leader ──► Redis "chain:heads" ──► HeadRing (chaque worker)
+                                                     ├─ head_number()     : plus d'eth_blockNumber par appelant
+                                                     ├─ header()          : hash d'un bloc récent
+                                                     ├─ log_window()      : eth_getLogs évité si les blooms l'excluent
+                                                     └─ wait() / subscribe() : réveil sur nouveau bloc
+
+Un réseau est suivi dès qu'un consommateur le demande (follow), pendant
+INTEREST_TTL ; le coût RPC devient O(blocs) au lieu de O(consommateurs × blocs).
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+from app.config.settings import settings
+from app.core.leader import LeaderLease
+from app.core.metrics import record_cache
+from app.core.redis_client import get_redis
+from app.utils.log_utils import _as_bytes, bloom_contains
+from app.utils.rpc_utils import NETWORK_RPC, RpcItemError, rpc, rpc_batch
+
+HEADS_CHANNEL = "chain:heads"
+INTEREST_KEY = "chain:heads:interest"   # ZSET réseau → dernière demande (epoch)
+RING_SIZE = 256            # en-têtes gardés par réseau (~70 Ko avec les blooms)
+BACKFILL_BLOCKS = 64       # historique lu au premier suivi d'un réseau
+REORG_STEP = 16            # recul par itération quand le parent ne correspond plus
+INTEREST_TTL = 600         # s sans demande avant d'arrêter de suivre un réseau
+INTEREST_REFRESH = 60      # s entre deux ZADD d'un même worker
+HEAD_MAX_AGE = 30          # s : au-delà, la tête en mémoire est considérée périmée
+RECONNECT_MAX_DELAY = 30   # s : attente max entre deux réabonnements Redis
+
+
+class BlockHeader(NamedTuple):
+    number: int
+    hash: str
+    parent_hash: str
+    timestamp: int
+    logs_bloom: bytes
+
+    @classmethod
+    def from_rpc(cls, block: dict) -> "BlockHeader":
+        return cls(
+            int(block["number"], 16),
+            block["hash"],
+            block["parentHash"],
+            int(block["timestamp"], 16),
+            _as_bytes(block["logsBloom"]),
+        )
+
+    def to_message(self, network: str) -> bytes:
+        return orjson.dumps({
+            "network": network,
+            "number": self.number,
+            "hash": self.hash,
+            "parent_hash": self.parent_hash,
+            "timestamp": self.timestamp,
+            "logs_bloom": "0x" + self.logs_bloom.hex(),
+        })
+
+
+class HeadRing:
+    """Derniers en-têtes *contigus* d'un réseau ; un reorg tronque ce qui est orphelin."""
+
+    def __init__(self, size: int = RING_SIZE):
+        self._headers: deque[BlockHeader] = deque()
+        self._by_number: Dict[int, BlockHeader] = {}
+        self.size = size
+        self.updated_at = 0.0
+
+    @property
+    def head(self) -> Optional[BlockHeader]:
+        return self._headers[-1] if self._headers else None
+
+    @property
+    def oldest(self) -> Optional[BlockHeader]:
+        return self._headers[0] if self._headers else None
+
+    def get(self, number: int) -> Optional[BlockHeader]:
+        return self._by_number.get(number)
+
+    def _truncate(self, number: int):
+        # retire les en-têtes >= number (orphelins)
+        while self._headers and self._headers[-1].number >= number:
+            del self._by_number[self._headers.pop().number]
+
+    def clear(self):
+        self._headers.clear()
+        self._by_number.clear()
+
+    def apply(self, header: BlockHeader) -> bool:
+        """Ajoute un en-tête ; False s'il était déjà connu (idempotent)."""
+        known = self._by_number.get(header.number)
+        if known is not None and known.hash == header.hash:
+            return False
+        self._truncate(header.number)
+        top = self.head
+        if top is not None and (top.number != header.number - 1 or top.hash != header.parent_hash):
+            # trou ou parent orphelin : rien de plus ancien n'est fiable
+            self.clear()
+        self._headers.append(header)
+        self._by_number[header.number] = header
+        while len(self._headers) > self.size:
+            del self._by_number[self._headers.popleft().number]
+        self.updated_at = time.monotonic()
+        return True
+
+    def covers(self, from_block: int, to_block: int) -> bool:
+        return bool(self._headers) and self._headers[0].number <= from_block and to_block <= self._headers[-1].number
+
+    def log_window(
+        self,
+        from_block: int,
+        to_block: int,
+        addresses: Iterable,
+        topics: Iterable = (),
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Plus petite plage [a, b] ⊂ [from_block, to_block] pouvant contenir un
+        log émis par `addresses` (avec l'un des `topics`, si fournis).
+        None si l'anneau ne couvre pas la plage (il faut tout lire), () si
+        les blooms excluent tous les blocs.
+        """
+        if not self.covers(from_block, to_block):
+            return None
+        addresses = [_as_bytes(a) for a in addresses]
+        topics = [_as_bytes(t) for t in topics]
+
+        def may_match(number: int) -> bool:
+            bloom = self._by_number[number].logs_bloom
+            return any(bloom_contains(bloom, a) for a in addresses) and (
+                not topics or any(bloom_contains(bloom, t) for t in topics)
+            )
+
+        first = next((n for n in range(from_block, to_block + 1) if may_match(n)), None)
+        if first is None:
+            return ()
+        last = next(n for n in range(to_block, first - 1, -1) if may_match(n))
+        return first, last
+
+
+class HeadFollower:
+    def __init__(self):
+        self._rings: Dict[str, HeadRing] = {}
+        self._subscribers: set[asyncio.Queue] = set()
+        self._new_block = asyncio.Event()
+        self._interest_sent: Dict[str, float] = {}
+        self._leader = LeaderLease("chain:heads:leader")
+
+    def ring(self, network: str) -> HeadRing:
+        ring = self._rings.get(network)
+        if ring is None:
+            ring = self._rings[network] = HeadRing()
+        return ring
+
+    # ===== Consommateurs =====
+    async def follow(self, network: str):
+        """Demande au leader de suivre `network` (rafraîchi au plus une fois par minute)."""
+        network = network.lower()
+        now = time.time()
+        if now - self._interest_sent.get(network, 0) < INTEREST_REFRESH:
+            return
+        self._interest_sent[network] = now
+        try:
+            await get_redis().zadd(INTEREST_KEY, {network: now})
+        except Exception as e:
+            print(f"⚠️ Head follower: cannot register {network}: {e}")
+
+    def fresh_ring(self, network: str) -> Optional[HeadRing]:
+        ring = self._rings.get(network.lower())
+        if ring is None or ring.head is None or time.monotonic() - ring.updated_at > HEAD_MAX_AGE:
+            return None
+        return ring
+
+    async def head_number(self, network: str) -> int:
+        """Numéro du dernier bloc : anneau partagé si à jour, sinon un eth_blockNumber."""
+        await self.follow(network)
+        ring = self.fresh_ring(network)
+        record_cache("chain_head", ring is not None)
+        if ring is not None:
+            return ring.head.number
+        return await rpc(network, "block_number")
+
+    def header(self, network: str, number: int) -> Optional[BlockHeader]:
+        """En-tête d'un bloc récent ; None si absent ou anneau périmé (à relire en RPC)."""
+        ring = self.fresh_ring(network)
+        return ring.get(number) if ring else None
+
+    def log_window(self, network: str, from_block: int, to_block: int, addresses: Iterable, topics: Iterable = ()):
+        """
+        Cf. HeadRing.log_window ; None si le réseau n'est pas suivi ou si
+        l'anneau est périmé (ses en-têtes ont pu être orphelins depuis).
+        """
+        ring = self.fresh_ring(network)
+        window = ring.log_window(from_block, to_block, addresses, topics) if ring else None
+        if window is not None:
+            record_cache("logs_bloom", window == ())
+        return window
+
+    async def wait(self, timeout: float):
+        """Rend la main au prochain bloc (tous réseaux) ou après `timeout` secondes."""
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._new_block.wait(), timeout)
+
+    def subscribe(self, size: int = 100) -> asyncio.Queue:
+        """File (réseau, BlockHeader) de chaque nouveau bloc vu par ce worker."""
+        queue: asyncio.Queue = asyncio.Queue(size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def apply(self, network: str, header: BlockHeader) -> bool:
+        if not self.ring(network).apply(header):
+            return False
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # consommateur lent : on sacrifie le plus ancien
+            queue.put_nowait((network, header))
+        self._new_block.set()
+        self._new_block = asyncio.Event()
+        return True
+
+    # ===== Leader : lecture des têtes =====
+    async def _fetch(self, network: str, start: int, end: int) -> List[BlockHeader]:
+        blocks = await rpc_batch(network, "eth_getBlockByNumber", [[hex(n), False] for n in range(start, end + 1)])
+        headers = []
+        for block in blocks:
+            if block is None or isinstance(block, RpcItemError):
+                break  # nœud pas encore à jour ou élément en erreur : la suite au prochain tour
+            headers.append(BlockHeader.from_rpc(block))
+        return headers
+
+    async def _poll(self, network: str) -> List[BlockHeader]:
+        head = await rpc(network, "block_number")
+        ring = self.ring(network)
+        top = ring.head
+        if top is not None and top.number >= head:
+            return []
+        start = max(top.number + 1 if top else head - BACKFILL_BLOCKS + 1, head - RING_SIZE + 1, 0)
+
+        headers = await self._fetch(network, start, head)
+        # le premier nouveau bloc doit prolonger l'anneau, sinon reorg : on recule
+        while headers and ring.oldest is not None and start > ring.oldest.number:
+            parent = ring.get(start - 1)
+            if parent is None or parent.hash == headers[0].parent_hash:
+                break
+            start = max(ring.oldest.number, start - REORG_STEP)
+            headers = await self._fetch(network, start, head)
+
+        applied = [h for h in headers if self.apply(network, h)]
+        if applied and top is not None and applied[0].number <= top.number:
+            print(f"⚠️ Reorg on {network}: new chain from block {applied[0].number}")
+        redis = get_redis()
+        for header in applied:
+            await redis.publish(HEADS_CHANNEL, header.to_message(network))
+        return applied
+
+    async def _followed_networks(self) -> List[str]:
+        redis = get_redis()
+        await redis.zremrangebyscore(INTEREST_KEY, "-inf", time.time() - INTEREST_TTL)
+        networks = set(await redis.zrange(INTEREST_KEY, 0, -1)) | set(settings.HEAD_FOLLOWER_NETWORKS)
+        return sorted(n for n in networks if n in NETWORK_RPC)
+
+    async def run_leader(self, interval: float = 2.0):
+        """Tâche de fond (chaque worker) : seul le détenteur du bail interroge les nœuds."""
+        try:
+            while True:
+                try:
+                    if await self._leader.acquire_or_renew():
+                        networks = await self._followed_networks()
+                        results = await asyncio.gather(*(self._poll(n) for n in networks), return_exceptions=True)
+                        for network, result in zip(networks, results):
+                            if isinstance(result, Exception):
+                                print(f"❌ Head follower failed on {network}: {result}")
+                except Exception as e:
+                    print(f"❌ Head follower tick failed: {e}")
+                await asyncio.sleep(interval)
+        finally:
+            with suppress(Exception):
+                await self._leader.release()
+
+    # ===== Tous les workers : en-têtes publiés par le leader =====
+    def _apply_message(self, data: bytes):
+        message = orjson.loads(data)
+        self.apply(message["network"], BlockHeader(
+            message["number"], message["hash"], message["parent_hash"],
+            message["timestamp"], _as_bytes(message["logs_bloom"]),
+        ))  # idempotent : le leader l'a déjà appliqué
+
+    async def run_subscriber(self):
+        """
+        Tâche de fond (chaque worker), réabonnée avec backoff si Redis coupe :
+        sans elle l'anneau vieillit et les lecteurs retombent sur le RPC.
+        """
+        delay = 1.0
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(HEADS_CHANNEL)
+                delay = 1.0
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self._apply_message(message["data"])
+                    except Exception as e:
+                        print(f"⚠️ Head follower: skipping malformed header message: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Head follower subscription lost: {e} (retry in {delay:.0f}s)")
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+head_follower = HeadFollower()
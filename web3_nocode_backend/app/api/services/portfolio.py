@@ -0,0 +1,133 @@
+# app/api/services/portfolio.py
+"""
+Portefeuille multi-chaînes : une requête, toutes les chaînes en parallèle.
+
+Les appels upstream (RPC, explorer) passent par un sémaphore global partagé
+entre toutes les requêtes : un pic de trafic ne peut pas ouvrir plus de
+PORTFOLIO_CONCURRENCY appels simultanés, y compris ceux dont la requête
+a déjà expiré (cf. _budgeted). Chaque chaîne a son propre timeout
+et son statut ; une chaîne lente ou en panne n'empêche pas la réponse.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from beanie.operators import In
+from eth_utils import from_wei, to_checksum_address
+
+from app.config.settings import settings
+from app.db.models.deployment import Deployment
+from app.utils.etherscan_utils import LOCAL_NETWORKS, get_wallet_activity
+from app.utils.rpc_utils import NETWORK_RPC, rpc
+from app.utils.abi_index import abi_index
+
+_upstream_budget = asyncio.Semaphore(settings.PORTFOLIO_CONCURRENCY)
+
+
+async def _budgeted(coro_fn, *args, **kwargs):
+    """
+    Le permis est rendu quand l'appel upstream se termine, pas quand
+    l'appelant abandonne : le timeout par chaîne annule l'attente, mais le
+    thread de to_thread continue jusqu'à sa réponse HTTP et doit rester
+    compté dans PORTFOLIO_CONCURRENCY.
+    """
+    await _upstream_budget.acquire()
+    try:
+        task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+    except BaseException:
+        _upstream_budget.release()
+        raise
+
+    def done(t: asyncio.Future):
+        _upstream_budget.release()
+        if not t.cancelled():
+            t.exception()  # appelant parti : évite "exception was never retrieved"
+
+    task.add_done_callback(done)
+    return await asyncio.shield(task)
+
+
+async def _native_balance(network: str, address: str) -> float:
+    wei = await rpc(network, "get_balance", to_checksum_address(address))
+    return float(from_wei(wei, "ether"))
+
+
+async def _chain_snapshot(network: str, address: str, activity_limit: int) -> Dict[str, Any]:
+    calls = [_budgeted(_native_balance, network, address)]
+    if network not in LOCAL_NETWORKS:
+        calls.append(_budgeted(get_wallet_activity, address, network=network, offset=activity_limit))
+
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    balance = results[0]
+    activity = results[1] if len(results) > 1 else []
+
+    errors = {}
+    if isinstance(balance, Exception):
+        errors["balance"] = str(balance)
+        balance = None
+    if isinstance(activity, Exception):
+        errors["transactions"] = str(activity)
+        activity = []
+
+    if not errors:
+        status = "ok"
+    elif len(errors) == len(calls):
+        status = "error"
+    else:
+        status = "partial"
+
+    return {
+        "status": status,
+        "errors": errors,
+        "balance": balance,
+        "transactions": abi_index.label_txs(activity, network),
+    }
+
+
+async def get_portfolio(
+    address: str,
+    networks: List[str] | None = None,
+    activity_limit: int = 20,
+) -> Dict[str, Any]:
+    address = address.lower()
+    networks = [n.lower() for n in (networks or NETWORK_RPC.keys())]
+
+    # Une seule requête Mongo pour toutes les chaînes
+    deployments = await Deployment.find(
+        Deployment.user_id == address,
+        In(Deployment.chain, networks),
+    ).to_list()
+    by_chain: Dict[str, list] = defaultdict(list)
+    for d in deployments:
+        by_chain[d.chain].append({
+            "id": str(d.id),
+            "address": d.contract_address,
+            "tx_hash": d.tx_hash,
+            "contract_type": d.contract_type,
+            "status": d.status,
+            "created_at": d.created_at,
+        })
+
+    async def one(network: str):
+        try:
+            return await asyncio.wait_for(
+                _chain_snapshot(network, address, activity_limit),
+                timeout=settings.PORTFOLIO_CHAIN_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            return {"status": "timeout", "errors": {}, "balance": None, "transactions": []}
+        except Exception as e:
+            return {"status": "error", "errors": {"chain": str(e)}, "balance": None, "transactions": []}
+
+    snapshots = await asyncio.gather(*(one(n) for n in networks))
+
+    chains = {}
+    for network, snap in zip(networks, snapshots):
+        chains[network] = {**snap, "deployments": by_chain.get(network, [])}
+
+    return {
+        "address": address,
+        "total_deployments": len(deployments),
+        "chains": chains,
+        "ok": all(c["status"] == "ok" for c in chains.values()),
+    }
@@ -1,47 +1,68 @@
 # app/utils/solidity_compiler.py
 
-from solcx import compile_standard, install_solc
+import asyncio
+import hashlib
+import sys
+import threading
+import orjson
 from pathlib import Path
+from app.config.settings import settings
+from app.core.metrics import record_cache, track_upstream
+from app.utils.singleflight import SingleFlight
 
 SOLC_VERSION = "0.8.20"
-install_solc(SOLC_VERSION)
+SOLC_SETTINGS = {
+    "optimizer": {"enabled": True, "runs": 200},
+    "outputSelection": {
+        "*": {
+            "*": ["abi", "evm.bytecode", "metadata"]
+        }
+    }
+}
+CONTRACTS_DIR = Path(__file__).resolve().parent.parent / "contracts"
 
-def compile_contract(contract_path: str, contract_name: str):
+# solcx et le binaire solc ne sont résolus qu'à la première compilation :
+# l'import de ce module ne touche ni au disque ni au réseau
+_solc_binary: str | None = None
+_solc_lock = threading.Lock()
+
+# (chemin, sha256 du source) → contrats compilés du fichier
+_ARTIFACTS: dict[tuple[str, str], dict] = {}
+# (chemin, sha256, contrat) → ABI déjà sérialisée en JSON
+_ABI_JSON: dict[tuple[str, str, str], orjson.Fragment] = {}
+_compile_flight = SingleFlight("solc")
+
+def compile_contract(contract_path: str, contract_name: str, abi_as_json: bool = False):
+    """
+    Retourne (abi, bytecode). Avec abi_as_json=True, l'ABI est un
+    orjson.Fragment pré-sérialisé (mis en cache) à insérer tel quel
+    dans une FastJSONResponse.
+    """
     contract_path = Path(contract_path)
 
     if not contract_path.exists():
         raise FileNotFoundError(f"Contract not found: {contract_path}")
 
     source = contract_path.read_text()
+    cache_key = (str(contract_path.resolve()), hashlib.sha256(source.encode()).hexdigest())
+    contracts = _ARTIFACTS.get(cache_key)
+    record_cache("solc_artifacts", contracts is not None)
+    if contracts is None:
+        # bundle pré-compilé (artifact_bundle) d'abord, solc seulement s'il est périmé
+        from app.api.services.artifact_bundle import bundled_contracts
 
-    compiled = compile_standard(
-        {
-            "language": "Solidity",
-            "sources": {
-                contract_path.name: {
-                    "content": source
-                }
-            },
-            "settings": {
-                "optimizer": {"enabled": True, "runs": 200},
-                "outputSelection": {
-                    "*": {
-                        "*": ["abi", "evm.bytecode"]
-                    }
-                }
-            }
-        },
-        solc_version=SOLC_VERSION,
-        base_path=".",          # 👈 IMPORTANT
-        allow_paths=".",        # 👈 CRITIQUE pour OpenZeppelin
-    )
+        contracts = bundled_contracts(contract_path, cache_key[1])
+        record_cache("solc_bundle", contracts is not None)
+        if contracts is None:
+            contracts = _compile_file(contract_path, source)
+        _ARTIFACTS[cache_key] = contracts
 
     try:
-        contract = compiled["contracts"][contract_path.name][contract_name]
+        contract = contracts[contract_name]
     except KeyError as e:
         raise Exception(
             f"Contract '{contract_name}' not found in {contract_path.name}. "
-            f"Available: {list(compiled['contracts'][contract_path.name].keys())}"
+            f"Available: {list(contracts.keys())}"
         )
 
     abi = contract["abi"]
@@ -50,4 +71,97 @@ def compile_contract(contract_path: str, contract_name: str):
     if not bytecode:
         raise Exception("Bytecode is empty (compilation failed)")
 
+    if abi_as_json:
+        abi_key = (*cache_key, contract_name)
+        abi_json = _ABI_JSON.get(abi_key)
+        if abi_json is None:
+            raw = contract.get("abi_json") or orjson.dumps(abi)  # octets du bundle tels quels
+            abi_json = _ABI_JSON[abi_key] = orjson.Fragment(raw)
+        return abi_json, bytecode
+
     return abi, bytecode
+
+
+async def compile_contract_async(contract_path: str, contract_name: str, abi_as_json: bool = False):
+    """
+    compile_contract hors du loop ; les compilations identiques simultanées
+    sont coalescées (un seul solc), les suivantes servies par le cache.
+    """
+    return await _compile_flight.do(
+        (str(contract_path), contract_name, abi_as_json),
+        asyncio.to_thread, compile_contract, contract_path, contract_name, abi_as_json,
+    )
+
+
+def resolve_solc() -> str:
+    """
+    Chemin du binaire solc, dans l'ordre :
+    1. SOLC_BINARY (binaire fourni par l'image)
+    2. cache local solcx (SOLCX_BINARY_PATH ou ~/.solcx), pré-provisionné au build
+    3. téléchargement, uniquement si SOLC_ALLOW_DOWNLOAD
+    """
+    global _solc_binary
+    if _solc_binary is None:
+        with _solc_lock:
+            if _solc_binary is None:
+                _solc_binary = _locate_solc()
+    return _solc_binary
+
+
+def _locate_solc() -> str:
+    if settings.SOLC_BINARY:
+        if not Path(settings.SOLC_BINARY).is_file():
+            raise RuntimeError(f"SOLC_BINARY not found: {settings.SOLC_BINARY}")
+        return settings.SOLC_BINARY
+
+    from solcx import install_solc
+    from solcx.exceptions import SolcNotInstalled
+    from solcx.install import get_executable
+
+    try:
+        return str(get_executable(SOLC_VERSION))
+    except SolcNotInstalled:
+        if not settings.SOLC_ALLOW_DOWNLOAD:
+            raise RuntimeError(
+                f"solc {SOLC_VERSION} is not in the local cache and downloads are disabled: "
+                "run `python -m app.api.services.solidity_compiler install` or set SOLC_BINARY"
+            )
+    print(f"⬇️ solc {SOLC_VERSION} missing from local cache, downloading...")
+    install_solc(SOLC_VERSION)
+    return str(get_executable(SOLC_VERSION))
+
+
+def _compile_file(contract_path: Path, source: str) -> dict:
+    solc_binary = resolve_solc()
+    from solcx import compile_standard
+
+    with track_upstream("solc", contract_path.name):
+        compiled = compile_standard(
+            {
+                "language": "Solidity",
+                "sources": {
+                    contract_path.name: {
+                        "content": source
+                    }
+                },
+                "settings": SOLC_SETTINGS,
+            },
+            solc_binary=solc_binary,
+            base_path=".",          # 👈 IMPORTANT
+            allow_paths=".",        # 👈 CRITIQUE pour OpenZeppelin
+        )
+
+    return compiled["contracts"][contract_path.name]
+
+
+if __name__ == "__main__":
+    # Provisionnement du cache (build d'image) :
+    #   python -m app.api.services.solidity_compiler install
+    if sys.argv[1:] == ["install"]:
+        from solcx import install_solc
+
+        install_solc(SOLC_VERSION)
+        print(f"✅ solc {SOLC_VERSION} installed")
+    else:
+        print("usage: python -m app.api.services.solidity_compiler install")
+        sys.exit(2)
@@ -0,0 +1,347 @@
+# app/api/services/token_holders.py
+"""
+Table des holders d'un ERC20, matérialisée à partir des Transfer indexés.
+
+Chaque sync ne lit que les blocs > last_block, applique les deltas aux soldes
+courants (TokenHolder) et journalise le solde après chaque bloc touché
+(TokenBalanceChange). Les hashes des derniers blocs vus permettent de
+détecter un reorg et de revenir à l'ancêtre commun avant de reprendre.
+
+Une seule sync par token dans tout le cluster (bail Redis, cf. LeaderLease) :
+deux workers qui appliqueraient la même plage doubleraient les soldes.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import suppress
+from datetime import datetime, timedelta
+
+from beanie.operators import In
+from pymongo import DeleteMany, UpdateOne
+from eth_utils import to_checksum_address
+
+from app.api.services.head_follower import head_follower
+from app.core.leader import LeaderLease
+from app.db.models.deployment import Deployment
+from app.db.models.event import Event
+from app.db.models.token_holder import (
+    TokenBalanceChange,
+    TokenHolder,
+    TokenSyncState,
+    balance_key,
+)
+from app.utils.log_fetcher import fetch_logs
+from app.utils.log_utils import ERC20_TRANSFER_TOPIC, decode_transfer_logs
+from app.utils.rpc_utils import get_network_web3, rpc
+
+ZERO_ADDRESS = "0x" + "00" * 20
+SYNC_CHUNK_BLOCKS = 2_000   # blocs par étape de sync (redécoupés au besoin par log_fetcher)
+REORG_WINDOW = 64           # profondeur de reorg surveillée
+
+BACKGROUND_SYNC_INTERVAL = timedelta(seconds=30)  # fraîcheur visée par les lectures
+SYNC_LEASE_MS = 60_000      # bail de sync, renouvelé à chaque plage appliquée
+SYNC_LEASE_WAIT = 60        # s d'attente max quand un autre worker synchronise le token
+
+_sync_locks: dict[tuple[str, str], asyncio.Lock] = defaultdict(asyncio.Lock)
+_background_syncs: set[asyncio.Task] = set()
+
+
+class SyncInProgress(RuntimeError):
+    """Le token est synchronisé par un autre worker (bail Redis détenu ailleurs)."""
+
+
+async def _hold_lease(lease: LeaderLease, wait: bool):
+    """Prend (ou renouvelle) le bail du token ; attend au plus SYNC_LEASE_WAIT si `wait`."""
+    deadline = time.monotonic() + SYNC_LEASE_WAIT
+    while not await lease.acquire_or_renew():
+        if not wait or time.monotonic() > deadline:
+            raise SyncInProgress(f"Token sync already running elsewhere ({lease.key})")
+        await asyncio.sleep(0.5)
+
+
+async def _start_block(network: str, token: str) -> int:
+    """Bloc de déploiement si on le connaît (évite de scanner depuis la genèse)."""
+    deployment = await Deployment.find_one(
+        Deployment.chain == network,
+        In(Deployment.contract_address, [token, to_checksum_address(token)]),
+    )
+    if deployment and deployment.tx_hash:
+        try:
+            receipt = await rpc(network, "get_transaction_receipt", deployment.tx_hash)
+            return receipt["blockNumber"]
+        except Exception:
+            pass
+    return 0
+
+
+async def _common_ancestor(state: TokenSyncState) -> int:
+    """
+    Plus haut bloc connu dont le hash est toujours canonique.
+    -1 si aucun ne l'est plus (reorg plus profond que la fenêtre) → resync complet.
+    """
+    if not state.recent_blocks:
+        return state.last_block
+    for number, block_hash in reversed(state.recent_blocks):
+        if await _block_hash(state.chain, number) == block_hash:
+            return number
+    return -1
+
+
+async def _block_hash(network: str, number: int) -> str:
+    """Hash canonique d'un bloc : anneau du head_follower, sinon RPC."""
+    header = head_follower.header(network, number)
+    if header is not None:
+        return header.hash
+    block = await rpc(network, "get_block", number)
+    return "0x" + bytes(block["hash"]).hex()
+
+
+async def _rollback(state: TokenSyncState, ancestor: int) -> bool:
+    """
+    Annule tout ce qui a été appliqué au-delà de `ancestor` (reorg ou sync
+    interrompue). Retourne True si l'état a changé.
+    """
+    chain, token = state.chain, state.token
+    reverted = await TokenBalanceChange.find(
+        TokenBalanceChange.chain == chain,
+        TokenBalanceChange.token == token,
+        TokenBalanceChange.block_number > ancestor,
+    ).to_list()
+    holders = {c.holder for c in reverted}
+    if not holders and ancestor == state.last_block:
+        return False
+
+    ops = []
+    for holder in holders:
+        previous = await TokenBalanceChange.find(
+            TokenBalanceChange.chain == chain,
+            TokenBalanceChange.token == token,
+            TokenBalanceChange.holder == holder,
+            TokenBalanceChange.block_number <= ancestor,
+        ).sort(-TokenBalanceChange.block_number).first_or_none()
+        balance = int(previous.balance) if previous else 0
+        ops.append(UpdateOne(
+            {"chain": chain, "token": token, "holder": holder},
+            {"$set": {
+                "balance": str(balance),
+                "balance_key": balance_key(balance),
+                "updated_block": previous.block_number if previous else ancestor,
+            }},
+            upsert=True,
+        ))
+
+    if ops:
+        await TokenHolder.get_motor_collection().bulk_write(ops, ordered=False)
+    await TokenBalanceChange.get_motor_collection().bulk_write([
+        DeleteMany({"chain": chain, "token": token, "block_number": {"$gt": ancestor}}),
+    ])
+    await Event.get_motor_collection().bulk_write([
+        DeleteMany({"chain": chain, "contract_address": token, "block_number": {"$gt": ancestor}}),
+    ])
+    state.last_block = ancestor
+    state.recent_blocks = [b for b in state.recent_blocks if b[0] <= ancestor]
+    # recompté : après une sync interrompue le compteur persisté est en retard
+    state.holder_count = await TokenHolder.find(
+        TokenHolder.chain == chain,
+        TokenHolder.token == token,
+        TokenHolder.balance_key > balance_key(0),
+    ).count()
+    return True
+
+
+async def _apply_range(state: TokenSyncState, from_block: int, to_block: int, lease: LeaderLease):
+    """
+    Lit les Transfer de [from_block, to_block] et les applique en bulk.
+    Le bail est renouvelé entre la lecture RPC et les écritures : s'il a été
+    perdu (lecture plus longue que SYNC_LEASE_MS), rien n'est écrit.
+    """
+    chain, token = state.chain, state.token
+    # blocs récents : les logsBloom disent si le token a pu émettre un Transfer
+    window = head_follower.log_window(chain, from_block, to_block, [token], [ERC20_TRANSFER_TOPIC])
+    if window is None:
+        window = (from_block, to_block)
+    logs = await fetch_logs(
+        chain, to_checksum_address(token), [ERC20_TRANSFER_TOPIC], window[0], window[1],
+    ) if window else []
+    block_hashes = {log["blockNumber"]: "0x" + bytes(log["blockHash"]).hex() for log in logs}
+    cols = decode_transfer_logs(logs)
+    if not await lease.acquire_or_renew():
+        raise SyncInProgress(f"Token sync lease lost ({lease.key})")
+
+    if len(cols):
+        senders = [a.lower() for a in cols.sender]
+        recipients = [a.lower() for a in cols.recipient]
+        touched = (set(senders) | set(recipients)) - {ZERO_ADDRESS}
+
+        balances = {h: 0 for h in touched}
+        async for h in TokenHolder.find(
+            TokenHolder.chain == chain,
+            TokenHolder.token == token,
+            In(TokenHolder.holder, list(touched)),
+        ):
+            balances[h.holder] = int(h.balance)
+        before = {h: b > 0 for h, b in balances.items()}
+
+        # solde après chaque bloc touché : {(holder, bloc): solde}
+        after_block: dict[tuple[str, int], int] = {}
+        for i in range(len(cols)):
+            block, value = int(cols.block_number[i]), cols.value[i]
+            if senders[i] != ZERO_ADDRESS:
+                balances[senders[i]] -= value
+                after_block[(senders[i], block)] = balances[senders[i]]
+            if recipients[i] != ZERO_ADDRESS:
+                balances[recipients[i]] += value
+                after_block[(recipients[i], block)] = balances[recipients[i]]
+
+        state.holder_count += sum(int(balances[h] > 0) - int(before[h]) for h in touched)
+
+        await TokenBalanceChange.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"chain": chain, "token": token, "holder": holder, "block_number": block},
+                {"$set": {"balance": str(balance)}},
+                upsert=True,
+            )
+            for (holder, block), balance in after_block.items()
+        ], ordered=False)
+
+        last_touch = {holder: block for holder, block in after_block}
+        await TokenHolder.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"chain": chain, "token": token, "holder": holder},
+                {"$set": {
+                    "balance": str(balances[holder]),
+                    "balance_key": balance_key(max(balances[holder], 0)),
+                    "updated_block": last_touch[holder],
+                }},
+                upsert=True,
+            )
+            for holder in touched
+        ], ordered=False)
+
+        # upserts sur (chaîne, contrat, bloc, log) : rejouer une plage ne duplique rien
+        now = datetime.utcnow()
+        await Event.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"chain": chain, "contract_address": token, "block_number": row["block"], "log_index": row["log_index"]},
+                {
+                    "$set": {
+                        "event_name": "Transfer",
+                        "args": {"from": row["from"], "to": row["to"], "value": str(row["value"])},
+                        "tx_hash": row["tx_hash"],
+                        "block_hash": block_hashes[row["block"]],
+                    },
+                    "$setOnInsert": {"deployment_id": None, "timestamp": now},
+                },
+                upsert=True,
+            )
+            for row in cols.rows()
+        ], ordered=False)
+
+    # le hash du dernier bloc de la plage sert d'ancre pour la détection de reorg
+    known = dict(map(tuple, state.recent_blocks))
+    known.update(block_hashes)
+    known[to_block] = await _block_hash(chain, to_block)
+    state.recent_blocks = [
+        [n, h] for n, h in sorted(known.items()) if n > to_block - REORG_WINDOW
+    ]
+    state.last_block = to_block
+
+
+async def sync_token(network: str, token: str, wait: bool = True) -> TokenSyncState:
+    """
+    Rattrape les Transfer d'un token jusqu'au bloc courant.
+    Idempotent : ce qui dépasse last_block (sync interrompue) est d'abord annulé.
+    SyncInProgress si un autre worker tient le bail (après SYNC_LEASE_WAIT si `wait`).
+    """
+    network, token = network.lower(), token.lower()
+    get_network_web3(network)  # ValueError si réseau inconnu
+
+    async with _sync_locks[(network, token)]:
+        lease = LeaderLease(f"token_holders:sync:{network}:{token}", ttl_ms=SYNC_LEASE_MS)
+        await _hold_lease(lease, wait)
+        try:
+            return await _sync(network, token, lease)
+        finally:
+            with suppress(Exception):
+                await lease.release()
+
+
+async def _sync(network: str, token: str, lease: LeaderLease) -> TokenSyncState:
+    # bail détenu : l'état relu ici ne peut plus être avancé par un autre worker
+    state = await TokenSyncState.find_one(
+        TokenSyncState.chain == network, TokenSyncState.token == token
+    )
+    if state is None:
+        state = TokenSyncState(
+            chain=network,
+            token=token,
+            last_block=await _start_block(network, token) - 1,
+        )
+        await state.insert()
+
+    ancestor = await _common_ancestor(state)
+    if ancestor < state.last_block:
+        print(f"⚠️ Reorg detected on {network} for {token}: rollback to {ancestor}")
+    if await _rollback(state, ancestor):
+        await state.save()
+
+    head = await head_follower.head_number(network)
+    from_block = state.last_block + 1
+    while from_block <= head:
+        to_block = min(head, from_block + SYNC_CHUNK_BLOCKS - 1)
+        await _apply_range(state, from_block, to_block, lease)
+        state.updated_at = datetime.utcnow()
+        await state.save()
+        from_block = to_block + 1
+
+    return state
+
+
+def schedule_sync(state: TokenSyncState):
+    """
+    Rattrapage en tâche de fond d'un token déjà indexé : les lectures servent
+    l'index tel quel sans attendre le RPC ni le verrou de sync.
+    """
+    if datetime.utcnow() - state.updated_at < BACKGROUND_SYNC_INTERVAL:
+        return
+    if _sync_locks[(state.chain, state.token)].locked():
+        return  # une sync est déjà en cours pour ce token
+
+    async def run():
+        try:
+            await sync_token(state.chain, state.token, wait=False)
+        except SyncInProgress:
+            pass  # un autre worker s'en charge
+        except Exception as e:
+            print(f"⚠️ Background token sync failed ({state.chain} {state.token}): {e}")
+
+    task = asyncio.create_task(run())
+    _background_syncs.add(task)
+    task.add_done_callback(_background_syncs.discard)
+
+
+# ===== Lectures (index Mongo, O(log n)) =====
+async def top_holders(network: str, token: str, n: int) -> list[TokenHolder]:
+    return await TokenHolder.find(
+        TokenHolder.chain == network.lower(),
+        TokenHolder.token == token.lower(),
+        TokenHolder.balance_key > balance_key(0),
+    ).sort(-TokenHolder.balance_key).limit(n).to_list()
+
+
+async def balance_at(network: str, token: str, holder: str, block: int | None) -> int:
+    if block is None:
+        current = await TokenHolder.find_one(
+            TokenHolder.chain == network.lower(),
+            TokenHolder.token == token.lower(),
+            TokenHolder.holder == holder.lower(),
+        )
+        return int(current.balance) if current else 0
+
+    change = await TokenBalanceChange.find(
+        TokenBalanceChange.chain == network.lower(),
+        TokenBalanceChange.token == token.lower(),
+        TokenBalanceChange.holder == holder.lower(),
+        TokenBalanceChange.block_number <= block,
+    ).sort(-TokenBalanceChange.block_number).first_or_none()
+    return int(change.balance) if change else 0
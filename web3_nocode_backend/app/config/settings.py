@@ -1,5 +1,6 @@
 # app/config/settings.py
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -23,5 +24,40 @@ class Settings:
 
     ETHERSCAN_KEY = os.getenv("ETHERSCAN_API_KEY")
 
+    # ===== Solidity =====
+    SOLC_BINARY = os.getenv("SOLC_BINARY")  # binaire solc explicite (sinon cache solcx)
+    SOLC_ALLOW_DOWNLOAD = os.getenv("SOLC_ALLOW_DOWNLOAD", "true").lower() in {"1", "true", "yes"}
+    # artefacts pré-compilés (python -m app.api.services.artifact_bundle build)
+    ARTIFACT_BUNDLE_PATH = os.getenv("ARTIFACT_BUNDLE_PATH", "artifacts/contracts.bundle")
+
+    # ===== Portfolio multi-chaînes =====
+    PORTFOLIO_CONCURRENCY = int(os.getenv("PORTFOLIO_CONCURRENCY", 12))
+    PORTFOLIO_CHAIN_TIMEOUT = float(os.getenv("PORTFOLIO_CHAIN_TIMEOUT", 8))
+
+    # ===== eth_getLogs =====
+    # réseau → requêtes simultanées, ex. {"polygon": 1} (défauts : app/utils/log_fetcher.py)
+    GETLOGS_CONCURRENCY = json.loads(os.getenv("GETLOGS_CONCURRENCY", "null")) or {}
+
+    # ===== Suivi des déploiements (receipts, confirmations, reorgs) =====
+    DEPLOYMENT_TRACKER_ENABLED = os.getenv("DEPLOYMENT_TRACKER_ENABLED", "true").lower() in {"1", "true", "yes"}
+    DEPLOYMENT_TRACKER_INTERVAL = float(os.getenv("DEPLOYMENT_TRACKER_INTERVAL", 2))
+
+    # ===== Suivi des têtes de chaîne (un leader interroge, tous les workers reçoivent) =====
+    HEAD_FOLLOWER_ENABLED = os.getenv("HEAD_FOLLOWER_ENABLED", "true").lower() in {"1", "true", "yes"}
+    HEAD_FOLLOWER_INTERVAL = float(os.getenv("HEAD_FOLLOWER_INTERVAL", 2))
+    # réseaux toujours suivis ; les autres le sont à la demande des consommateurs
+    HEAD_FOLLOWER_NETWORKS = [n.strip().lower() for n in os.getenv("HEAD_FOLLOWER_NETWORKS", "").split(",") if n.strip()]
+
+    # ===== Rate limiting (token bucket Redis, partagé entre workers) =====
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in {"1", "true", "yes"}
+    # plan → [capacité du bucket, jetons regagnés par seconde]
+    RATE_LIMIT_PLANS = json.loads(os.getenv("RATE_LIMIT_PLANS", "null")) or {
+        "anonymous": [30, 0.25],
+        "free": [60, 0.5],
+        "pro": [600, 5.0],
+    }
+    # route → coût en jetons (surcharge les poids par défaut des routes)
+    RATE_LIMIT_COSTS = json.loads(os.getenv("RATE_LIMIT_COSTS", "null")) or {}
+
 settings = Settings()
 
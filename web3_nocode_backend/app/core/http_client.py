@@ -0,0 +1,23 @@
+# app/core/http_client.py
+import httpx
+
+# Pool HTTP partagé (explorers...) : keep-alive entre requêtes au lieu
+# d'un AsyncClient (et d'un handshake TLS) par appel
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=20,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,51 @@
+# app/core/leader.py
+import os
+import socket
+import uuid
+
+from app.core.redis_client import get_redis
+
+# Renouvelle le bail seulement si on en est toujours le détenteur,
+# sinon tente de le prendre (SET NX).
+_ACQUIRE_OR_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """
+    Élection d'un leader parmi les workers via un bail Redis expirant.
+
+    Les tâches de fond qui ne doivent tourner qu'une fois par cluster
+    (polling on-chain...) appellent `acquire_or_renew()` à chaque tour ;
+    si le leader meurt, le bail expire et un autre worker le reprend.
+    """
+
+    def __init__(self, key: str, ttl_ms: int = 10_000):
+        self.key = key
+        self.ttl_ms = ttl_ms
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+
+    async def acquire_or_renew(self) -> bool:
+        redis = get_redis()
+        self.is_leader = bool(await redis.eval(_ACQUIRE_OR_RENEW_LUA, 1, self.key, self.owner, self.ttl_ms))
+        return self.is_leader
+
+    async def release(self):
+        if self.is_leader:
+            await get_redis().eval(_RELEASE_LUA, 1, self.key, self.owner)
+            self.is_leader = False
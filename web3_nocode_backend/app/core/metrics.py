@@ -0,0 +1,181 @@
+# app/core/metrics.py
+import asyncio
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+# Buckets en secondes : du cache (ms) jusqu'aux gros getLogs / compilations solc
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# ===== HTTP =====
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latence des requêtes HTTP par route FastAPI",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requêtes HTTP en cours de traitement",
+    multiprocess_mode="livesum",  # somme des workers vivants (gunicorn)
+)
+
+# ===== Upstreams (solc, rpc, explorer, mongo) =====
+UPSTREAM_LATENCY = Histogram(
+    "upstream_call_duration_seconds",
+    "Durée des appels upstream par type",
+    ["kind", "operation", "network"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_CALLS = Counter(
+    "upstream_calls_total",
+    "Nombre d'appels upstream par type et résultat",
+    ["kind", "operation", "network", "outcome"],
+)
+
+# ===== Caches =====
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Accès aux caches applicatifs (hit / miss)",
+    ["cache", "result"],
+)
+
+# ===== Singleflight =====
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Appels passés par un groupe singleflight (leader = appel upstream réel)",
+    ["group", "role"],
+)
+
+# ===== Rate limiting =====
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total",
+    "Décisions du limiteur par route et plan (allowed / limited / bypass)",
+    ["route", "plan", "decision"],
+)
+
+# ===== eth_getLogs adaptatif =====
+GETLOGS_RANGE_ADJUSTMENTS = Counter(
+    "getlogs_range_adjustments_total",
+    "Ajustements de la plage eth_getLogs par réseau (split / grow / shrink / relax)",
+    ["network", "action"],
+)
+
+# ===== Event loop =====
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Retard du loop asyncio par rapport à l'heure prévue",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+@contextmanager
+def track_upstream(kind: str, operation: str, network: str = "-"):
+    """
+    Chronomètre un appel upstream et le compte par résultat (ok / error).
+    kind ∈ {"solc", "rpc", "explorer", "mongo"}.
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(kind, operation, network).observe(time.perf_counter() - start)
+        UPSTREAM_CALLS.labels(kind, operation, network, outcome).inc()
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+# ===== Middleware HTTP =====
+class RouteMetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Mesure la latence par *template* de route (/deploy/byUser/{user_address})
+    et non par chemin brut, pour garder une cardinalité bornée.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path == "/metrics":
+            return await call_next(request)
+
+        start = time.perf_counter()
+        status = "500"
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_LATENCY.labels(request.method, route_path, status).observe(
+                time.perf_counter() - start
+            )
+
+
+# ===== Mongo (pymongo command monitoring) =====
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Listener pymongo : chaque commande est chronométrée et étiquetée par
+    "forme" de requête (commande + collection + clés du filtre), jamais par valeurs.
+    """
+
+    IGNORED = {"isMaster", "hello", "ping", "saslStart", "saslContinue", "endSessions"}
+
+    def __init__(self):
+        self._shapes: dict[tuple, str] = {}
+
+    @staticmethod
+    def _shape(event: monitoring.CommandStartedEvent) -> str:
+        cmd = event.command
+        collection = cmd.get(event.command_name, "")
+        if not isinstance(collection, str):
+            collection = ""
+        filt = cmd.get("filter")
+        if filt is None and event.command_name in {"update", "delete"}:
+            ops = cmd.get("updates") or cmd.get("deletes") or []
+            filt = ops[0].get("q") if ops else None
+        keys = ",".join(sorted(filt.keys())) if isinstance(filt, dict) else ""
+        return f"{event.command_name}:{collection}:{{{keys}}}"
+
+    def started(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        self._shapes[(event.connection_id, event.request_id)] = self._shape(event)
+
+    def _finish(self, event, outcome: str):
+        shape = self._shapes.pop((event.connection_id, event.request_id), None)
+        if shape is None:
+            return
+        UPSTREAM_LATENCY.labels("mongo", shape, "-").observe(event.duration_micros / 1e6)
+        UPSTREAM_CALLS.labels("mongo", shape, "-", outcome).inc()
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+# ===== Event loop lag =====
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """
+    Tâche de fond : dort `interval` secondes et mesure le dépassement.
+    Un lag élevé = du code bloquant (web3 sync, solc) tourne sur le loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio as aioredis
 from app.core.config import settings
 
 redis_client = redis.Redis(
@@ -7,3 +8,27 @@ redis_client = redis.Redis(
     password=settings.REDIS_PASSWORD,
     decode_responses=True
 )
+
+# Client asyncio partagé (pool de connexions par worker), ouvert/fermé
+# par le lifespan de l'app
+_async_client: aioredis.Redis | None = None
+
+
+def get_redis() -> aioredis.Redis:
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True,
+            health_check_interval=30,
+        )
+    return _async_client
+
+
+async def close_redis():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -0,0 +1,45 @@
+# app/core/responses.py
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # orjson gère nativement dict/list/str/int/float/datetime/UUID/numpy
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return "0x" + bytes(obj).hex()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse orjson qui accepte aussi les documents Mongo bruts (ObjectId,
+    bytes...). Retournée directement par une route, elle court-circuite
+    jsonable_encoder : une seule passe d'encodage, en C.
+
+    Les blobs déjà sérialisés (ABI en cache) passent via orjson.Fragment
+    et sont recopiés tels quels dans la réponse.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -5,9 +5,31 @@ from app.db.models.template import Template
 from app.db.models.build import Build
 from app.db.models.deployment import Deployment, DeploymentRecord
 from app.db.models.event import Event
+from app.db.models.token_holder import TokenHolder, TokenBalanceChange, TokenSyncState
 from app.core.config import settings
+from app.core.metrics import MongoCommandMetrics
+
+DOCUMENT_MODELS = [
+    User, Template, Build, Deployment, Event,
+    TokenHolder, TokenBalanceChange, TokenSyncState,
+]
+
+
+_client: motor.motor_asyncio.AsyncIOMotorClient | None = None
+
 
 async def init_db():
-    client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URI)
-    db = client[settings.MONGO_DB_NAME]
-    await init_beanie(database=db, document_models=[User, Template, Build, Deployment, Event])
+    global _client
+    _client = motor.motor_asyncio.AsyncIOMotorClient(
+        settings.MONGODB_URI,
+        event_listeners=[MongoCommandMetrics()],
+    )
+    db = _client[settings.MONGO_DB_NAME]
+    await init_beanie(database=db, document_models=DOCUMENT_MODELS)
+
+
+def close_db():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
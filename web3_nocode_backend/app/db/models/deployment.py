@@ -1,6 +1,7 @@
 from beanie import Document
 from datetime import datetime
 from pydantic import BaseModel
+from pymongo import ASCENDING, IndexModel
 from typing import Optional, List
 
 class Deployment(Document):
@@ -15,8 +16,21 @@ class Deployment(Document):
     status: str = "created"
     created_at: datetime = datetime.utcnow()
 
+    # ===== Suivi on-chain (cf. deployment_tracker) =====
+    # pending → included → confirmed (confirmations >= profondeur réseau)
+    #         ↘ failed (receipt status 0 ou tx abandonnée) ; reorged si le bloc disparaît
+    confirmations: int = 0
+    block_number: Optional[int] = None
+    block_hash: Optional[str] = None
+    finalized: bool = False
+    status_reason: Optional[str] = None
+    status_updated_at: Optional[datetime] = None
+
     class Settings:
         name = "deployments"
+        indexes = [
+            IndexModel([("finalized", ASCENDING), ("status", ASCENDING), ("chain", ASCENDING)]),
+        ]
 
 
 class ContractData(Document):
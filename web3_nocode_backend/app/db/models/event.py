@@ -1,14 +1,34 @@
 from beanie import Document
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
+import pymongo
 
 class Event(Document):
-    deployment_id: str
+    deployment_id: Optional[str] = None
     event_name: str
     args: Dict
     block_number: int
     tx_hash: str
     timestamp: datetime = datetime.utcnow()
+    # 👇 renseignés par l'indexation on-chain (token_holders)
+    chain: Optional[str] = None
+    contract_address: Optional[str] = None
+    log_index: Optional[int] = None
+    block_hash: Optional[str] = None
 
     class Settings:
         name = "events"
+        indexes = [
+            # unique pour les events indexés on-chain : une plage rejouée
+            # (sync concurrente, reprise) ne peut pas dupliquer un log
+            pymongo.IndexModel(
+                [
+                    ("chain", pymongo.ASCENDING),
+                    ("contract_address", pymongo.ASCENDING),
+                    ("block_number", pymongo.ASCENDING),
+                    ("log_index", pymongo.ASCENDING),
+                ],
+                unique=True,
+                partialFilterExpression={"chain": {"$type": "string"}, "log_index": {"$type": "int"}},
+            ),
+        ]
@@ -0,0 +1,65 @@
+from beanie import Document
+from datetime import datetime
+from typing import List
+import pymongo
+
+# uint256 → 78 chiffres max : une chaîne zero-padded se trie comme le nombre
+BALANCE_KEY_DIGITS = 78
+
+
+def balance_key(balance: int) -> str:
+    return f"{balance:0{BALANCE_KEY_DIGITS}d}"
+
+
+class TokenHolder(Document):
+    """Solde courant d'un holder (table matérialisée, mise à jour incrémentale)."""
+    chain: str
+    token: str          # adresse du contrat, lowercase
+    holder: str         # lowercase
+    balance: str        # uint256 en décimal (dépasse l'int64 Mongo)
+    balance_key: str    # balance zero-padded pour le tri top-N
+    updated_block: int
+
+    class Settings:
+        name = "token_holders"
+        indexes = [
+            pymongo.IndexModel(
+                [("chain", 1), ("token", 1), ("holder", 1)], unique=True
+            ),
+            [("chain", 1), ("token", 1), ("balance_key", pymongo.DESCENDING)],
+        ]
+
+
+class TokenBalanceChange(Document):
+    """Solde d'un holder *après* un bloc : sert au solde-à-un-bloc et au rollback."""
+    chain: str
+    token: str
+    holder: str
+    block_number: int
+    balance: str
+
+    class Settings:
+        name = "token_balance_changes"
+        indexes = [
+            pymongo.IndexModel(
+                [("chain", 1), ("token", 1), ("holder", 1), ("block_number", pymongo.DESCENDING)],
+                unique=True,
+            ),
+            [("chain", 1), ("token", 1), ("block_number", 1)],
+        ]
+
+
+class TokenSyncState(Document):
+    """Curseur de synchronisation d'un token + hashes récents pour détecter les reorgs."""
+    chain: str
+    token: str
+    last_block: int = -1
+    recent_blocks: List[List] = []   # [[numéro, hash], ...] croissant
+    holder_count: int = 0
+    updated_at: datetime = datetime.utcnow()
+
+    class Settings:
+        name = "token_sync_states"
+        indexes = [
+            pymongo.IndexModel([("chain", 1), ("token", 1)], unique=True),
+        ]
@@ -1,14 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.init_db import init_db
-from app.api import routes_auth, routes_templates, routes_deployment, routes_dashboard, hello_deployment
+from app.db.init_db import init_db, close_db
+from app.api import rate_limit, routes_auth, routes_templates, routes_deployment, routes_dashboard, hello_deployment, routes_metrics, routes_tokens, routes_export
+from app.core.metrics import RouteMetricsMiddleware, monitor_event_loop_lag
+from app.core.responses import FastJSONResponse
 from app.config.networks_init import init_networks
 from app.config.networks import NETWORKS
+from app.core.http_client import close_http_client
+from app.core.redis_client import close_redis, get_redis
+from app.utils.rpc_utils import close_web3
+from app.api.services import artifact_bundle, contract_index, deployment_tracker
+from app.api.services.head_follower import head_follower
+from app.config.settings import settings
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ===== Démarrage (une fois par worker) =====
+    rate_limit.validate_plans()
+    init_networks()
+    print("NETWORKS:", list(NETWORKS.keys()))
+    artifact_bundle.load_bundle()
+    await init_db()
+    await contract_index.build_abi_index()
+    await get_redis().ping()
+    await routes_auth.init_jwt_secret()
+    app.state.background_tasks = [
+        asyncio.create_task(monitor_event_loop_lag()),
+        asyncio.create_task(deployment_tracker.status_hub.run()),
+        asyncio.create_task(contract_index.run_index_sync()),
+        asyncio.create_task(head_follower.run_subscriber()),
+    ]
+    if settings.HEAD_FOLLOWER_ENABLED:
+        app.state.background_tasks.append(asyncio.create_task(
+            head_follower.run_leader(settings.HEAD_FOLLOWER_INTERVAL)
+        ))
+    if settings.DEPLOYMENT_TRACKER_ENABLED:
+        app.state.background_tasks.append(asyncio.create_task(
+            deployment_tracker.run_tracker(settings.DEPLOYMENT_TRACKER_INTERVAL)
+        ))
+
+    yield
+
+    # ===== Arrêt =====
+    # uvicorn/gunicorn ont déjà cessé d'accepter des connexions et attendu
+    # la fin des requêtes en cours (graceful timeout) avant d'arriver ici
+    for task in app.state.background_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+    await close_http_client()
+    await close_redis()
+    close_web3()
+    close_db()
+    artifact_bundle.close_bundle()
+    print("👋 Worker stopped cleanly")
 
 
-app = FastAPI(title="NoCode Web3 Backend", version="0.1.0")
+app = FastAPI(
+    title="NoCode Web3 Backend",
+    version="0.1.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,18 +72,16 @@ app.add_middleware(
     allow_methods=["*"],  # autorise POST, GET, OPTIONS, etc.
     allow_headers=["*"],
 )
-
-@app.on_event("startup")
-async def startup():
-    init_networks()
-    print("NETWORKS:", list(NETWORKS.keys()))
-    await init_db()
+app.add_middleware(RouteMetricsMiddleware)
 
 app.include_router(routes_auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(routes_templates.router, prefix="/templates", tags=["Templates"])
 app.include_router(routes_deployment.router, prefix="/deploy", tags=["deployment"])
 app.include_router(hello_deployment.router, prefix="/deploy", tags=["deployment"])
 app.include_router(routes_dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(routes_tokens.router, prefix="/tokens", tags=["Tokens"])
+app.include_router(routes_export.router, prefix="/export", tags=["Export"])
+app.include_router(routes_metrics.router, tags=["Metrics"])
 
 @app.get("/")
 async def root():
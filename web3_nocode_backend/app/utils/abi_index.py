@@ -0,0 +1,223 @@
+# app/utils/abi_index.py
+"""
+Index mémoire compact pour décoder txs et logs sans reparser d'ABI :
+
+    sélecteur (4 octets)  → décodeur de fonction
+    topic0 (32 octets)    → décodeur(s) d'event (par nombre de topics indexés)
+    (réseau, adresse)     → (id du déploiement, hash de l'ABI)
+
+Les clés sont des bytes bruts (pas de chaînes hex) et les décodeurs sont
+partagés par signature : 1 000 déploiements du même ERC20 coûtent une
+entrée par adresse, pas une ABI de plus. Les adresses sont rangées par
+réseau : la même adresse (anvil déterministe, même deployer/nonce sur
+plusieurs chaînes) peut désigner des contrats différents.
+
+Construit au démarrage depuis Mongo (build_abi_index), mis à jour à chaque
+nouveau déploiement ; les autres workers l'apprennent via Redis pub/sub.
+"""
+import hashlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import orjson
+from eth_utils import keccak
+
+from app.utils.log_utils import _as_bytes, checksum_address
+
+# Fragments ERC20 standards : les txs vers n'importe quel token sont étiquetées
+ERC20_ABI = [
+    {"type": "function", "name": "transfer", "inputs": [
+        {"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}]},
+    {"type": "function", "name": "transferFrom", "inputs": [
+        {"name": "from", "type": "address"}, {"name": "to", "type": "address"},
+        {"name": "value", "type": "uint256"}]},
+    {"type": "function", "name": "approve", "inputs": [
+        {"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}]},
+    {"type": "event", "name": "Transfer", "inputs": [
+        {"name": "from", "type": "address", "indexed": True},
+        {"name": "to", "type": "address", "indexed": True},
+        {"name": "value", "type": "uint256", "indexed": False}]},
+    {"type": "event", "name": "Approval", "inputs": [
+        {"name": "owner", "type": "address", "indexed": True},
+        {"name": "spender", "type": "address", "indexed": True},
+        {"name": "value", "type": "uint256", "indexed": False}]},
+]
+
+
+class FunctionDecoder(NamedTuple):
+    name: str
+    signature: str
+    arg_names: tuple
+    arg_types: tuple
+
+
+class EventDecoder(NamedTuple):
+    name: str
+    signature: str
+    indexed: tuple        # ((nom, type), ...) dans l'ordre des topics
+    data_names: tuple
+    data_types: tuple
+
+
+def _canonical_type(param: Dict[str, Any]) -> str:
+    kind = param["type"]
+    if kind.startswith("tuple"):
+        inner = ",".join(_canonical_type(c) for c in param.get("components", []))
+        return f"({inner}){kind[len('tuple'):]}"
+    return kind
+
+
+def _jsonable(value: Any) -> Any:
+    # uint256 > 2^64 ne passe pas en JSON natif (orjson) : entiers en chaîne
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def abi_hash(abi: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1(orjson.dumps(abi, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+
+
+class AbiIndex:
+    def __init__(self):
+        self._selectors: Dict[bytes, FunctionDecoder] = {}
+        self._topics: Dict[bytes, tuple] = {}                       # topic0 → (EventDecoder, ...)
+        self._addresses: Dict[tuple, tuple] = {}                    # (réseau, adresse) → (deployment_id, abi_hash)
+        self._overrides: Dict[tuple, FunctionDecoder] = {}          # (abi_hash, sélecteur) en collision
+        self._decoders: Dict[str, NamedTuple] = {}                  # signature → décodeur partagé
+        self._abis: set[str] = set()
+
+    # ===== Construction =====
+    def add_abi(self, abi: List[Dict[str, Any]]) -> str:
+        """Enregistre sélecteurs et topics d'une ABI (idempotent, par hash)."""
+        digest = abi_hash(abi)
+        if digest in self._abis:
+            return digest
+        self._abis.add(digest)
+
+        for item in abi:
+            inputs = item.get("inputs", [])
+            signature = f"{item.get('name')}({','.join(_canonical_type(p) for p in inputs)})"
+            if item.get("type") == "function":
+                decoder = self._decoders.get(signature)
+                if decoder is None:
+                    decoder = self._decoders[signature] = FunctionDecoder(
+                        item["name"], signature,
+                        tuple(p.get("name") or f"arg{i}" for i, p in enumerate(inputs)),
+                        tuple(_canonical_type(p) for p in inputs),
+                    )
+                selector = keccak(text=signature)[:4]
+                known = self._selectors.setdefault(selector, decoder)
+                if known is not decoder:
+                    # deux signatures, même sélecteur : l'ABI du contrat appelé tranche
+                    self._overrides[(digest, selector)] = decoder
+            elif item.get("type") == "event" and not item.get("anonymous"):
+                key = signature + "/" + ",".join("1" if p.get("indexed") else "0" for p in inputs)
+                decoder = self._decoders.get(key)
+                if decoder is None:
+                    decoder = self._decoders[key] = EventDecoder(
+                        item["name"], signature,
+                        tuple((p.get("name") or f"arg{i}", _canonical_type(p)) for i, p in enumerate(inputs) if p.get("indexed")),
+                        tuple(p.get("name") or f"arg{i}" for i, p in enumerate(inputs) if not p.get("indexed")),
+                        tuple(_canonical_type(p) for p in inputs if not p.get("indexed")),
+                    )
+                topic = keccak(text=signature)
+                variants = self._topics.get(topic, ())
+                if decoder not in variants:
+                    self._topics[topic] = variants + (decoder,)
+        return digest
+
+    def add_contract(self, network: str, address: str, deployment_id: str, abi: List[Dict[str, Any]]):
+        digest = self.add_abi(abi)
+        self._addresses[((network or "").lower(), _as_bytes(address))] = (deployment_id, digest)
+
+    # ===== Lectures O(1) =====
+    def lookup_address(self, network: str, address: Optional[str]) -> Optional[tuple]:
+        if not address:
+            return None
+        try:
+            return self._addresses.get(((network or "").lower(), _as_bytes(address)))
+        except ValueError:
+            return None
+
+    def decode_call(self, input_data: Any, abi_digest: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Calldata → {method, signature, args} ; None si sélecteur inconnu."""
+        raw = _as_bytes(input_data) if input_data else b""
+        if len(raw) < 4:
+            return None
+        selector = raw[:4]
+        decoder = (abi_digest and self._overrides.get((abi_digest, selector))) or self._selectors.get(selector)
+        if decoder is None:
+            return None
+        decoded = {"method": decoder.name, "signature": decoder.signature, "args": None}
+        try:
+            from eth_abi import decode
+
+            values = decode(list(decoder.arg_types), raw[4:])
+            decoded["args"] = dict(zip(decoder.arg_names, _jsonable(list(values))))
+        except Exception:
+            pass  # sélecteur connu mais arguments non conformes : on garde le nom
+        return decoded
+
+    def decode_log(self, topics: List[Any], data: Any) -> Optional[Dict[str, Any]]:
+        """Log brut → {event, signature, args} ; None si topic inconnu."""
+        if not topics:
+            return None
+        variants = self._topics.get(_as_bytes(topics[0]))
+        if not variants:
+            return None
+        decoder = next((d for d in variants if len(d.indexed) == len(topics) - 1), None)
+        if decoder is None:
+            return None
+
+        from eth_abi import decode
+
+        args: Dict[str, Any] = {}
+        for (name, kind), topic in zip(decoder.indexed, topics[1:]):
+            raw = _as_bytes(topic)
+            if kind == "address":
+                args[name] = checksum_address(raw[-20:])
+            elif kind in {"string", "bytes"} or kind.endswith("]") or kind.startswith("("):
+                args[name] = "0x" + raw.hex()  # type dynamique indexé : seul son hash est dans le topic
+            else:
+                args[name] = _jsonable(decode([kind], raw)[0])
+        try:
+            args.update(zip(decoder.data_names, _jsonable(list(decode(list(decoder.data_types), _as_bytes(data or b""))))))
+        except Exception:
+            pass
+        return {"event": decoder.name, "signature": decoder.signature, "args": args}
+
+    def label_tx(self, tx: Dict[str, Any], network: str) -> Dict[str, Any]:
+        """
+        Copie étiquetée d'une tx explorer de `network` (jamais modifiée en
+        place : les résultats explorer sont partagés entre requêtes par le
+        singleflight).
+        """
+        contract = self.lookup_address(network, tx.get("to"))
+        decoded = self.decode_call(tx.get("input"), contract[1] if contract else None)
+        return {
+            **tx,
+            "method": decoded["method"] if decoded else None,
+            "decoded_args": decoded["args"] if decoded else None,
+            "deployment_id": contract[0] if contract else None,
+        }
+
+    def label_txs(self, txs: Iterable[Dict[str, Any]], network: str) -> List[Dict[str, Any]]:
+        return [self.label_tx(tx, network) for tx in txs]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "abis": len(self._abis),
+            "selectors": len(self._selectors),
+            "topics": len(self._topics),
+            "addresses": len(self._addresses),
+        }
+
+
+abi_index = AbiIndex()
+abi_index.add_abi(ERC20_ABI)
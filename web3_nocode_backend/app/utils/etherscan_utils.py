@@ -1,6 +1,10 @@
 # app/utils/etherscan_utils.py
 from typing import Any, Dict, List, Optional
-import httpx
+
+from app.config.settings import settings
+from app.core.http_client import get_http_client
+from app.core.metrics import track_upstream
+from app.utils.singleflight import SingleFlight
 
 # ✅ mapping explorer API (Etherscan-family)
 ETHERSCAN_API_BASE = {
@@ -26,13 +30,26 @@ def _get_api_base(network: str) -> str:
     raise ValueError(f"Unsupported network for explorer API: {network}")
 
 
-async def _etherscan_get(api_base: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(api_base, params=params)
+_explorer_flight = SingleFlight("explorer")
+
+
+async def _fetch_explorer(api_base: str, params: Dict[str, Any], network: str) -> Dict[str, Any]:
+    with track_upstream("explorer", str(params.get("action", "-")), network):
+        r = await get_http_client().get(api_base, params=params)
         r.raise_for_status()
         return r.json()
 
 
+async def _etherscan_get(
+    api_base: str,
+    params: Dict[str, Any],
+    network: str = "-",
+) -> Dict[str, Any]:
+    # requêtes identiques simultanées (même dashboard ouvert partout) → un seul appel
+    key = (api_base, tuple(sorted((k, str(v)) for k, v in params.items())))
+    return await _explorer_flight.do(key, _fetch_explorer, api_base, params, network)
+
+
 async def get_wallet_balance(
     user_address: str,
     api_key: Optional[str],
@@ -46,6 +63,7 @@ async def get_wallet_balance(
     if net in LOCAL_NETWORKS:
         return None
 
+    api_key = api_key or settings.ETHERSCAN_KEY
     if not api_key:
         # pas de clé => on ne casse pas, mais on ne peut pas appeler l'API correctement
         raise ValueError("Missing ETHERSCAN_API_KEY (or equivalent)")
@@ -62,6 +80,7 @@ async def get_wallet_balance(
             "tag": "latest",
             "apikey": api_key,
         },
+        network=net,
     )
 
     # Etherscan renvoie status/message/result
@@ -84,6 +103,8 @@ async def get_wallet_activity(
     page: int = 1,
     offset: int = 20,
     sort: str = "desc",
+    startblock: int = 0,
+    endblock: int = 99999999,
 ) -> List[Dict[str, Any]]:
     """
     Retourne les txs 'normales' (list) via explorer API.
@@ -93,6 +114,7 @@ async def get_wallet_activity(
     if net in LOCAL_NETWORKS:
         return []
 
+    api_key = api_key or settings.ETHERSCAN_KEY
     if not api_key:
         raise ValueError("Missing ETHERSCAN_API_KEY (or equivalent)")
 
@@ -105,13 +127,14 @@ async def get_wallet_activity(
             "module": "account",
             "action": "txlist",
             "address": address,
-            "startblock": 0,
-            "endblock": 99999999,
+            "startblock": startblock,
+            "endblock": endblock,
             "page": page,
             "offset": offset,
             "sort": sort,
             "apikey": api_key,
         },
+        network=net,
     )
 
     # Etherscan: status=0 message="No transactions found"
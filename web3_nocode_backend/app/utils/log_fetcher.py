@@ -0,0 +1,249 @@
+# app/utils/log_fetcher.py
+"""
+eth_getLogs sur de grandes plages, malgré les limites des fournisseurs
+(Infura : 10 000 résultats max, RPC publics polygon/bsc/avalanche : plage
+de blocs plafonnée, timeouts sur les plages denses).
+
+La plage est découpée en fenêtres dont la taille s'adapte par réseau :
+
+    erreur "trop de résultats / plage trop large / timeout" → la fenêtre est
+                                                             redécoupée (taille suggérée
+                                                             ou moitié, récursivement)
+    réponse légère sur une fenêtre pleine                   → taille doublée
+    réponse lourde                                          → taille divisée par deux
+
+Les fenêtres sont lues en parallèle (sémaphore par fournisseur) et rendues
+dans l'ordre des blocs. La taille apprise est gardée pour les appels suivants ;
+un plafond de plage annoncé par le fournisseur est oublié après MAX_SPAN_TTL
+(une seule erreur suffit à le réapprendre s'il est toujours en vigueur).
+
+    async with aclosing(iter_logs("polygon", token, [TOPIC], 0, head)) as chunks:
+        async for logs in chunks:
+            ...
+"""
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.metrics import GETLOGS_RANGE_ADJUSTMENTS
+from app.utils.rpc_utils import rpc
+
+# taille de départ des fenêtres (blocs), affinée ensuite par les réponses
+INITIAL_SPAN = {
+    "anvil": 100_000,
+    "ethereum": 2_000,
+    "sepolia": 10_000,
+    "polygon": 2_000,
+    "bsc": 2_000,
+    "avalanche": 2_048,
+}
+DEFAULT_INITIAL_SPAN = 2_000
+MAX_SPAN = 1_000_000
+MAX_SPAN_TTL = 600         # s avant d'oublier un plafond de plage appris
+
+# requêtes eth_getLogs simultanées par fournisseur (surchargeable : GETLOGS_CONCURRENCY)
+PROVIDER_CONCURRENCY = {
+    "anvil": 8,
+    "ethereum": 4,
+    "sepolia": 4,
+    "polygon": 2,
+    "bsc": 2,
+    "avalanche": 2,
+}
+DEFAULT_CONCURRENCY = 2
+
+# au-delà, la fenêtre rétrécit avant que le fournisseur ne refuse
+TARGET_RESULTS = 5_000
+# morceaux max d'une fenêtre refusée (les morceaux encore trop gros sont redécoupés)
+MAX_SPLIT_PARTS = 64
+
+_RANGE_ERRORS = (
+    "more than", "too many", "limit exceeded", "range is too", "range too",
+    "block range", "response size", "size exceeded", "timeout", "timed out",
+    "limited to", "max range", "maximum is set to",
+)
+_SUGGESTED_RANGE = re.compile(r"\[0x([0-9a-f]+),\s*0x([0-9a-f]+)\]")
+_NUMBER = r"(\d[\d,]*)(k?)\b"
+# plafonds de plage explicites uniquement : "cap of 10K logs" (Alchemy) est
+# une limite de résultats, pas de blocs
+_MAX_RANGE = tuple(re.compile(pattern) for pattern in (
+    # QuickNode, Alchemy : "limited to a 10,000 blocks range" / "limited to a 10,000 range"
+    r"limited to an? " + _NUMBER + r" (?:blocks? )?range",
+    # geth (bsc, publicnode) : "exceed maximum block range: 5000" ; "max range: 800"
+    r"max(?:imum)? (?:block )?range(?: is| of)?:? " + _NUMBER,
+    # avalanche : "requested too many blocks from 0 to 100000, maximum is set to 2048"
+    r"maximum is set to " + _NUMBER,
+    # Alchemy (offre gratuite) : "up to a 10 block range." ; pas "up to a 2K block
+    # range and no limit on the response size", qui n'est pas un plafond
+    r"up to an? " + _NUMBER + r" block range(?! and no limit)",
+))
+
+
+def _parse_count(digits: str, suffix: str) -> int:
+    """'10,000' → 10000, '10' + 'k' → 10000."""
+    return int(digits.replace(",", "")) * (1_000 if suffix else 1)
+
+
+def _range_error(error: Exception) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    (taille suggérée, plage max annoncée) si l'erreur vient d'une plage trop
+    grosse, None sinon (erreur à remonter telle quelle).
+    """
+    message = str(error).lower()
+    if not any(marker in message for marker in _RANGE_ERRORS):
+        return None
+    suggested = max_range = None
+    match = _SUGGESTED_RANGE.search(message)
+    if match:
+        # Infura : "Try with this block range [0x…, 0x…]"
+        suggested = int(match.group(2), 16) - int(match.group(1), 16) + 1
+    for pattern in _MAX_RANGE:
+        match = pattern.search(message)
+        if match:
+            max_range = _parse_count(*match.groups()) or None
+            break
+    return suggested, max_range
+
+
+class ProviderLogs:
+    """Taille de fenêtre apprise et concurrence d'un fournisseur RPC (un par réseau)."""
+
+    def __init__(self, network: str):
+        self.network = network
+        self.span = INITIAL_SPAN.get(network, DEFAULT_INITIAL_SPAN)
+        self.max_span = MAX_SPAN
+        self.max_span_at = 0.0          # monotonic : dernier plafond annoncé
+        self.concurrency = settings.GETLOGS_CONCURRENCY.get(
+            network, PROVIDER_CONCURRENCY.get(network, DEFAULT_CONCURRENCY)
+        )
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    def _too_large(self, size: int, hint: Tuple[Optional[int], Optional[int]]):
+        suggested, max_range = hint
+        if max_range:
+            self.max_span = min(self.max_span, max_range)
+            self.max_span_at = time.monotonic()
+        self.span = max(1, min(self.span, suggested or size // 2, self.max_span))
+        GETLOGS_RANGE_ADJUSTMENTS.labels(self.network, "split").inc()
+
+    def _succeeded(self, size: int, results: int):
+        if self.max_span < MAX_SPAN and time.monotonic() - self.max_span_at > MAX_SPAN_TTL:
+            # plafond peut-être levé (changement d'offre, autre nœud derrière l'URL)
+            self.max_span = MAX_SPAN
+            GETLOGS_RANGE_ADJUSTMENTS.labels(self.network, "relax").inc()
+        if results > TARGET_RESULTS:
+            self.span = max(1, min(self.span, size // 2))
+            GETLOGS_RANGE_ADJUSTMENTS.labels(self.network, "shrink").inc()
+        elif results < TARGET_RESULTS // 4 and size >= self.span and self.span < self.max_span:
+            # seules les fenêtres pleines comptent (pas la fin de plage, plus courte)
+            self.span = min(self.max_span, self.span * 2)
+            GETLOGS_RANGE_ADJUSTMENTS.labels(self.network, "grow").inc()
+
+    async def fetch(self, criteria: Dict[str, Any], from_block: int, to_block: int) -> List[Any]:
+        """Tous les logs de [from_block, to_block], en coupant la plage autant que nécessaire."""
+        async with self.semaphore:
+            try:
+                logs = await rpc(self.network, "get_logs", {**criteria, "fromBlock": from_block, "toBlock": to_block})
+                hint = None
+            except Exception as e:
+                hint = _range_error(e)
+                if hint is None or from_block == to_block:
+                    raise
+                logs = None
+
+        size = to_block - from_block + 1
+        if logs is None:
+            # redécoupée à la taille apprise (au moins en deux), hors du sémaphore :
+            # chaque morceau reprend un slot
+            self._too_large(size, hint)
+            step = max(min(self.span, (size + 1) // 2), -(-size // MAX_SPLIT_PARTS))
+            parts = await asyncio.gather(*(
+                self.fetch(criteria, start, min(to_block, start + step - 1))
+                for start in range(from_block, to_block + 1, step)
+            ))
+            return [log for part in parts for log in part]
+
+        self._succeeded(size, len(logs))
+        return logs
+
+
+_providers: Dict[str, ProviderLogs] = {}
+
+
+def _provider(network: str) -> ProviderLogs:
+    provider = _providers.get(network)
+    if provider is None:
+        provider = _providers[network] = ProviderLogs(network)
+    return provider
+
+
+async def iter_logs(
+    network: str,
+    address: Any,
+    topics: Optional[List[Any]],
+    from_block: int,
+    to_block: int,
+    descending: bool = False,
+) -> AsyncIterator[List[Any]]:
+    """
+    Logs de [from_block, to_block] par lots, dans l'ordre des blocs (ou du
+    plus récent au plus ancien avec descending=True : l'ordre des lots est
+    inversé, chaque lot reste croissant). Les lots vides ne sont pas émis.
+
+    Au plus 2 × concurrence fenêtres sont en vol ou en attente d'émission :
+    la mémoire reste bornée quelle que soit la plage.
+    """
+    network = network.lower()
+    provider = _provider(network)
+    criteria: Dict[str, Any] = {"address": address}
+    if topics:
+        criteria["topics"] = topics
+
+    cursor = to_block if descending else from_block
+    pending: deque[asyncio.Future] = deque()
+
+    def remaining() -> bool:
+        return cursor >= from_block if descending else cursor <= to_block
+
+    def next_window() -> Tuple[int, int]:
+        # taille lue à chaque fenêtre : les réponses précédentes l'ont peut-être ajustée
+        nonlocal cursor
+        if descending:
+            start, end = max(from_block, cursor - provider.span + 1), cursor
+            cursor = start - 1
+        else:
+            start, end = cursor, min(to_block, cursor + provider.span - 1)
+            cursor = end + 1
+        return start, end
+
+    try:
+        while pending or remaining():
+            while remaining() and len(pending) < 2 * provider.concurrency:
+                start, end = next_window()
+                pending.append(asyncio.ensure_future(provider.fetch(criteria, start, end)))
+            logs = await pending.popleft()
+            if logs:
+                yield logs
+    finally:
+        # consommateur parti (break, client déconnecté) ou erreur : on n'attend pas le reste
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def fetch_logs(
+    network: str,
+    address: Any,
+    topics: Optional[List[Any]],
+    from_block: int,
+    to_block: int,
+) -> List[Any]:
+    """Tous les logs de la plage, triés par bloc (pour les plages bornées)."""
+    logs: List[Any] = []
+    async for chunk in iter_logs(network, address, topics, from_block, to_block):
+        logs.extend(chunk)
+    return logs
@@ -0,0 +1,152 @@
+# app/utils/log_utils.py
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator
+
+import numpy as np
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+# keccak("Transfer(address,address,uint256)") — constante : pas de web3 à l'import
+ERC20_TRANSFER_TOPIC = HexBytes("0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef")
+
+# adresse 20 octets bruts → clé hashable pour np.unique
+_ADDRESS_DTYPE = np.dtype((np.void, 20))
+
+
+@lru_cache(maxsize=65536)
+def checksum_address(raw: bytes) -> str:
+    """Checksum EIP-55 mémoïsé (keccak coûteux, adresses très répétées)."""
+    return to_checksum_address(raw)
+
+
+@lru_cache(maxsize=4096)
+def _bloom_bits(item: bytes) -> tuple:
+    # 3 bits parmi 2048 : paires d'octets (0,1), (2,3), (4,5) de keccak(item)
+    digest = keccak(item)
+    bits = (((digest[i] << 8) | digest[i + 1]) & 2047 for i in (0, 2, 4))
+    return tuple((255 - bit // 8, 1 << (bit % 8)) for bit in bits)
+
+
+def bloom_contains(bloom: bytes, item) -> bool:
+    """
+    logsBloom (256 octets) d'un bloc : False si `item` (adresse de contrat
+    ou topic) n'apparaît certainement dans aucun de ses logs.
+    """
+    return all(bloom[i] & mask for i, mask in _bloom_bits(_as_bytes(item)))
+
+
+def _as_bytes(value) -> bytes:
+    # web3 renvoie des HexBytes, le JSON-RPC brut des chaînes "0x..."
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def decode_transfer_log(log: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Décode un log ERC20 Transfer brut (topics indexés + data) en
+    {from, to, value}. value est un int Python (uint256).
+    """
+    data = _as_bytes(log["data"])
+
+    return {
+        "from": checksum_address(_as_bytes(log["topics"][1])[-20:]),
+        "to": checksum_address(_as_bytes(log["topics"][2])[-20:]),
+        "value": int.from_bytes(data, "big") if data else 0,
+    }
+
+
+@dataclass
+class TransferColumns:
+    """
+    Transfers décodés en colonnes (une ligne par log, ordre d'entrée conservé).
+    value est un tableau d'objets : un uint256 ne tient pas dans un dtype NumPy.
+    """
+
+    block_number: np.ndarray  # int64
+    log_index: np.ndarray     # int64
+    tx_hash: np.ndarray       # object[str] "0x..."
+    sender: np.ndarray        # object[str] checksum
+    recipient: np.ndarray     # object[str] checksum
+    value: np.ndarray         # object[int]
+
+    def __len__(self) -> int:
+        return len(self.block_number)
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield {
+                "block": int(self.block_number[i]),
+                "log_index": int(self.log_index[i]),
+                "tx_hash": self.tx_hash[i],
+                "from": self.sender[i],
+                "to": self.recipient[i],
+                "value": self.value[i],
+            }
+
+
+def _checksum_column(raw: np.ndarray) -> np.ndarray:
+    """(n, 20) uint8 → checksum par adresse *unique* puis redistribué."""
+    keys = np.ascontiguousarray(raw).view(_ADDRESS_DTYPE).ravel()
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    labels = np.array([checksum_address(u.tobytes()) for u in uniques], dtype=object)
+    return labels[inverse.ravel()]
+
+
+def _join_raw(values: list) -> bytes:
+    """Concatène une colonne de HexBytes (ou de chaînes "0x...") en un seul buffer."""
+    if values and isinstance(values[0], str):
+        return bytes.fromhex("".join(v[2:] for v in values))
+    return b"".join(values)
+
+
+def _int_column(values: list) -> np.ndarray:
+    if values and isinstance(values[0], str):
+        values = [int(v, 16) for v in values]
+    return np.asarray(values, dtype=np.int64)
+
+
+def decode_transfer_logs(logs: Iterable[Dict[str, Any]]) -> TransferColumns:
+    """
+    Décodage en lot des logs ERC20 Transfer.
+
+    Chaque champ est extrait en une passe, concaténé dans un buffer contigu
+    puis découpé en vues NumPy ; le checksum n'est calculé qu'une fois par
+    adresse unique. Les logs qui ne sont pas des Transfer ERC20 (autre topic0
+    comme Approval, ou ERC721 : tokenId indexé, data vide) sont ignorés.
+    """
+    # data : 32 octets (HexBytes) ou "0x" + 64 hex (JSON-RPC brut)
+    logs = [
+        log for log in logs
+        if len(log["topics"]) == 3
+        and len(log["data"]) in (32, 66)
+        and _as_bytes(log["topics"][0]) == ERC20_TRANSFER_TOPIC
+    ]
+    n = len(logs)
+    if n == 0:
+        empty = np.empty(0, dtype=object)
+        return TransferColumns(
+            np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), empty, empty, empty, empty
+        )
+
+    # (n, 32) : les 20 derniers octets de chaque topic sont l'adresse
+    senders = np.frombuffer(_join_raw([log["topics"][1] for log in logs]), dtype=np.uint8).reshape(n, 32)
+    recipients = np.frombuffer(_join_raw([log["topics"][2] for log in logs]), dtype=np.uint8).reshape(n, 32)
+
+    data_mv = memoryview(_join_raw([log["data"] for log in logs]))
+    values = np.empty(n, dtype=object)
+    values[:] = [int.from_bytes(data_mv[i:i + 32], "big") for i in range(0, n * 32, 32)]
+
+    hashes_hex = _join_raw([log["transactionHash"] for log in logs]).hex()
+    tx_hashes = np.empty(n, dtype=object)
+    tx_hashes[:] = ["0x" + hashes_hex[i:i + 64] for i in range(0, n * 64, 64)]
+
+    return TransferColumns(
+        block_number=_int_column([log["blockNumber"] for log in logs]),
+        log_index=_int_column([log["logIndex"] for log in logs]),
+        tx_hash=tx_hashes,
+        sender=_checksum_column(senders[:, 12:]),
+        recipient=_checksum_column(recipients[:, 12:]),
+        value=values,
+    )
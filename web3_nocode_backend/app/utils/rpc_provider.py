@@ -0,0 +1,25 @@
+# app/utils/rpc_provider.py
+from web3 import HTTPProvider
+
+from app.core.metrics import track_upstream
+
+
+class InstrumentedHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider qui chronomètre chaque méthode JSON-RPC (eth_getLogs,
+    eth_getBalance, ...) par réseau.
+    """
+
+    def __init__(self, endpoint_uri: str, network: str, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.network = network
+
+    def make_request(self, method, params):
+        with track_upstream("rpc", str(method), self.network):
+            return super().make_request(method, params)
+
+    def make_batch_request(self, batch_requests):
+        methods = {str(method) for method, _ in batch_requests}
+        operation = "batch:" + (methods.pop() if len(methods) == 1 else "mixed")
+        with track_upstream("rpc", operation, self.network):
+            return super().make_batch_request(batch_requests)
@@ -0,0 +1,148 @@
+# app/utils/rpc_utils.py
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any
+
+from app.utils.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    import requests
+    from web3 import Web3
+
+# 🌐 RPC endpoints supportés
+NETWORK_RPC = {
+    "anvil": "http://127.0.0.1:8545",
+    "ethereum": "https://mainnet.infura.io/v3/388983b8720e4493844f9ac9ba1f725c",
+    "sepolia": "https://sepolia.infura.io/v3/388983b8720e4493844f9ac9ba1f725c",
+    "polygon": "https://polygon-rpc.com",
+    "bsc": "https://bsc-dataseed.binance.org",
+    "avalanche": "https://api.avax.network/ext/bc/C/rpc",
+}
+
+
+# Une instance Web3 par (réseau, url) : on réutilise la session HTTP
+# au lieu de rouvrir une connexion à chaque requête.
+# web3 (~1 s d'import avec eth_account) n'est chargé qu'au premier appel RPC.
+_WEB3_CACHE: dict[tuple[str, str], "Web3"] = {}
+_SESSIONS: list["requests.Session"] = []
+
+# connexions keep-alive par hôte RPC : >= threads de asyncio.to_thread
+RPC_POOL_SIZE = 32
+
+
+def _rpc_session() -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=RPC_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    _SESSIONS.append(session)
+    return session
+
+
+def get_web3(rpc_url: str, network: str) -> "Web3":
+    key = (network, rpc_url)
+    w3 = _WEB3_CACHE.get(key)
+    if w3 is None:
+        from web3 import Web3
+
+        from app.utils.rpc_provider import InstrumentedHTTPProvider
+
+        w3 = Web3(InstrumentedHTTPProvider(rpc_url, network=network, session=_rpc_session()))
+        _WEB3_CACHE[key] = w3
+    return w3
+
+
+def close_web3():
+    """Ferme les pools HTTP RPC (arrêt du worker)."""
+    for session in _SESSIONS:
+        session.close()
+    _SESSIONS.clear()
+    _WEB3_CACHE.clear()
+
+
+def get_network_web3(network: str) -> "Web3":
+    network = (network or "").lower()
+    rpc_url = NETWORK_RPC.get(network)
+    if not rpc_url:
+        raise ValueError(f"Unsupported network: {network}")
+    return get_web3(rpc_url, network)
+
+
+_rpc_flight = SingleFlight("rpc")
+
+
+def _call_eth(network: str, method: str, args: tuple) -> Any:
+    attr = getattr(get_network_web3(network).eth, method)
+    return attr(*args) if callable(attr) else attr
+
+
+async def rpc(network: str, method: str, *args) -> Any:
+    """
+    Appel `w3.eth.<method>(*args)` hors du loop (thread), coalescé :
+    des appels identiques simultanés (même réseau, méthode, arguments)
+    partagent une seule requête upstream.
+
+        logs = await rpc("sepolia", "get_logs", {...})
+        head = await rpc("anvil", "block_number")
+    """
+    network = (network or "").lower()
+    key = (network, method, json.dumps(args, sort_keys=True, default=str))
+    return await _rpc_flight.do(key, asyncio.to_thread, _call_eth, network, method, args)
+
+
+# appels max par requête batch : au-delà, les fournisseurs refusent le batch
+# entier ou répondent en erreur (rate limit) sur les derniers éléments
+RPC_BATCH_SIZE = {
+    "anvil": 500,
+    "ethereum": 100,
+    "sepolia": 100,
+}
+DEFAULT_RPC_BATCH_SIZE = 20
+
+
+class RpcItemError(Exception):
+    """Un élément d'un batch a échoué (rate limit, plafond du fournisseur) : résultat inconnu."""
+
+
+def _batch_eth(network: str, method: str, params_list: list) -> list:
+    provider = get_network_web3(network).provider
+    size = RPC_BATCH_SIZE.get(network, DEFAULT_RPC_BATCH_SIZE)
+    results: list = []
+    for i in range(0, len(params_list), size):
+        chunk = params_list[i:i + size]
+        try:
+            responses = provider.make_batch_request([(method, params) for params in chunk])
+        except Exception as e:
+            # lot refusé en bloc (HTTP 429, timeout) : seuls ses éléments sont en échec
+            results.extend(RpcItemError(str(e)) for _ in chunk)
+            continue
+        if not isinstance(responses, list):
+            # erreur globale : le nœud renvoie un seul objet d'erreur
+            error = RpcItemError(f"Batch {method} failed on {network}: {responses.get('error')}")
+            results.extend(error for _ in chunk)
+            continue
+        for response in responses:
+            if "error" in response:
+                results.append(RpcItemError(str(response["error"])))
+            else:
+                results.append(response.get("result"))
+        # réponse tronquée : les éléments manquants ne sont pas des `null`
+        results.extend(RpcItemError("missing from batch response") for _ in chunk[len(responses):])
+    return results
+
+
+async def rpc_batch(network: str, method: str, params_list: list) -> list:
+    """
+    N appels de la même méthode en requêtes HTTP JSON-RPC batch (découpées
+    selon RPC_BATCH_SIZE). Résultats bruts (hex), dans l'ordre des
+    paramètres : None si le nœud a répondu `null`, une instance de
+    RpcItemError si l'appel a échoué (à ne pas confondre avec une absence).
+
+        receipts = await rpc_batch("sepolia", "eth_getTransactionReceipt", [[h1], [h2]])
+    """
+    if not params_list:
+        return []
+    return await asyncio.to_thread(_batch_eth, (network or "").lower(), method, params_list)
@@ -0,0 +1,42 @@
+# app/utils/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.metrics import SINGLEFLIGHT_CALLS
+
+
+class SingleFlight:
+    """
+    Coalescence d'appels async identiques : tant qu'un appel pour `key` est
+    en vol, les appels suivants attendent le même résultat au lieu de
+    repartir vers l'upstream.
+
+    Le travail tourne dans sa propre tâche : l'annulation d'un appelant
+    (client déconnecté) n'annule pas le résultat attendu par les autres.
+    Le résultat est partagé tel quel : les appelants ne doivent pas le muter.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.labels(self.group, "leader").inc()
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.group, "coalesced").inc()
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # évite "exception was never retrieved" si tous les appelants sont partis
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,267 @@
+# bench/load.py
+"""
+Benchmark de charge : lance l'app FastAPI contre des doublures locales
+(anvil, faux Etherscan, Mongo) et rejoue un mix de trafic réaliste.
+
+    python -m bench.load --duration 30 --concurrency 32 --mongo mock
+    python -m bench.load --json bench_output.json --baseline bench_baseline.json
+
+Rapporte débit et percentiles de latence par endpoint ; avec --baseline,
+sort en erreur si un p99 régresse au-delà de --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from bench import stand_ins
+
+APP_PORT = 8765
+EXPLORER_PORT = 8766
+ANVIL_PORT = 8545
+
+# Poids du mix de trafic (≈ trafic prod observé)
+DEFAULT_MIX = {
+    "siwe_login": 1,
+    "prepare_deploy": 2,
+    "record_deploy": 1,
+    "dashboard": 6,
+}
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kwargs)
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            r, ok = None, False
+        self.latencies[label].append(time.perf_counter() - start)
+        if not ok:
+            self.errors[label] += 1
+        return r
+
+    def report(self, duration: float) -> dict:
+        out = {}
+        for label, values in sorted(self.latencies.items()):
+            values.sort()
+            out[label] = {
+                "count": len(values),
+                "errors": self.errors.get(label, 0),
+                "rps": len(values) / duration,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p90_ms": percentile(values, 90) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        return out
+
+
+# ===== Scénarios =====
+def siwe_message(domain: str, address: str, nonce: str) -> str:
+    issued = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return (
+        f"{domain} wants you to sign in with your Ethereum account:\n"
+        f"{address}\n\n"
+        "Sign in to the bench.\n\n"
+        f"URI: http://{domain}\n"
+        "Version: 1\n"
+        "Chain ID: 31337\n"
+        f"Nonce: {nonce}\n"
+        f"Issued At: {issued}"
+    )
+
+
+async def scenario_siwe_login(client, rec: Recorder, ctx: dict, rng: random.Random):
+    account = rng.choice(ctx["wallets"])
+    r = await rec.call(client, "GET /auth/siwe/nonce", "GET", "/auth/siwe/nonce")
+    if r is None or r.status_code != 200:
+        return
+    message = siwe_message(ctx["domain"], account.address, r.json()["nonce"])
+    signature = "0x" + bytes(account.sign_message(encode_defunct(text=message)).signature).hex()
+    await rec.call(
+        client, "POST /auth/siwe/verify", "POST", "/auth/siwe/verify",
+        json={"message": message, "signature": signature},
+    )
+
+
+async def scenario_prepare_deploy(client, rec: Recorder, ctx: dict, rng: random.Random):
+    await rec.call(client, "POST /deploy/prepare_erc20", "POST", "/deploy/prepare_erc20", json={})
+
+
+async def scenario_record_deploy(client, rec: Recorder, ctx: dict, rng: random.Random):
+    account = rng.choice(ctx["wallets"])
+    await rec.call(
+        client, "POST /deploy/record_erc20", "POST", "/deploy/record_erc20",
+        json={
+            "contract_address": ctx["token"],
+            "tx_hash": "0x" + "%064x" % rng.getrandbits(256),
+            "chain": "anvil",
+            "user_id": account.address,
+            "abi": ctx["token_abi"],
+            "contract_type": "erc20",
+        },
+    )
+
+
+async def scenario_dashboard(client, rec: Recorder, ctx: dict, rng: random.Random):
+    account = rng.choice(ctx["wallets"])
+    await rec.call(
+        client, "GET /deploy/byUser/{user_address}", "GET",
+        f"/deploy/byUser/{account.address}", params={"network": "sepolia"},
+    )
+    await rec.call(
+        client, "GET /dashboard/contract/transactions", "GET", "/dashboard/contract/transactions",
+        params={"contract_address": ctx["token"], "network": "anvil", "limit": 20},
+    )
+
+
+SCENARIOS = {
+    "siwe_login": scenario_siwe_login,
+    "prepare_deploy": scenario_prepare_deploy,
+    "record_deploy": scenario_record_deploy,
+    "dashboard": scenario_dashboard,
+}
+
+
+async def drive(ctx: dict, mix: dict, duration: float, concurrency: int, seed: int) -> dict:
+    rec = Recorder()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + duration
+
+    async def worker(i: int):
+        rng = random.Random(seed + i)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=60) as client:
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                await SCENARIOS[name](client, rec, ctx, rng)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return rec.report(time.perf_counter() - start)
+
+
+# ===== Setup =====
+def setup(args) -> dict:
+    anvil = stand_ins.start_anvil(ANVIL_PORT)
+    rpc_url = f"http://127.0.0.1:{ANVIL_PORT}"
+    seeded = stand_ins.seed_chain(rpc_url, transfers=args.transfers)
+
+    stand_ins.serve_in_thread(
+        stand_ins.make_mock_explorer(latency_ms=args.explorer_latency_ms), EXPLORER_PORT
+    )
+
+    # Branche l'app sur les doublures (avant démarrage)
+    from app.api import routes_auth, routes_dashboard
+    from app.config.settings import settings
+    from app.utils import etherscan_utils
+
+    explorer_url = f"http://127.0.0.1:{EXPLORER_PORT}/api"
+    for net in list(etherscan_utils.ETHERSCAN_API_BASE):
+        etherscan_utils.ETHERSCAN_API_BASE[net] = explorer_url
+    settings.ETHERSCAN_KEY = settings.ETHERSCAN_KEY or "bench"
+    routes_dashboard.NETWORK_RPC["anvil"] = rpc_url
+
+    if args.mongo == "mock":
+        stand_ins.use_mongomock()
+
+    from app.main import app
+    stand_ins.serve_in_thread(app, APP_PORT)
+
+    rng = random.Random(args.seed)
+    wallets = [Account.from_key(rng.getrandbits(256).to_bytes(32, "big")) for _ in range(args.users)]
+
+    return {
+        "anvil": anvil,
+        "domain": routes_auth.APP_DOMAIN,
+        "token": seeded["token"],
+        "token_abi": seeded["token_abi"],
+        "wallets": wallets,
+    }
+
+
+def print_report(report: dict):
+    header = f"{'endpoint':<42}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for label, r in report.items():
+        print(
+            f"{label:<42}{r['count']:>8}{r['errors']:>6}{r['rps']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}"
+        )
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for label, r in report.items():
+        base = baseline.get(label)
+        if not base or not base.get("p99_ms"):
+            continue
+        if r["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p99 {r['p99_ms']:.1f}ms > baseline {base['p99_ms']:.1f}ms (+{tolerance:.0%})"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--transfers", type=int, default=200)
+    parser.add_argument("--explorer-latency-ms", type=float, default=30)
+    parser.add_argument("--mongo", choices=["local", "mock"], default="local",
+                        help="local = MONGODB_URI (mongod), mock = mongomock_motor en mémoire")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX,
+                        help='poids JSON, ex: \'{"dashboard": 1}\'')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--baseline", help="rapport JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    ctx = setup(args)
+    try:
+        report = asyncio.run(drive(ctx, args.mix, args.duration, args.concurrency, args.seed))
+    finally:
+        if ctx["anvil"] is not None:
+            ctx["anvil"].terminate()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# bench/micro.py
+"""
+Micro-benchmarks des chemins chauds, sans réseau :
+
+    python -m bench.micro
+    python -m bench.micro --only parse_siwe --json micro.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from hexbytes import HexBytes
+
+from app.api.routes_auth import parse_siwe
+from app.api.services.solidity_compiler import compile_contract
+from app.utils.abi_index import abi_index
+from app.utils.log_utils import ERC20_TRANSFER_TOPIC, decode_transfer_log, decode_transfer_logs
+
+SIWE_SAMPLE = (
+    "localhost:3000 wants you to sign in with your Ethereum account:\n"
+    "0x9858EfFD232B4033E47d90003D41EC34EcaEda94\n\n"
+    "Sign in to the app.\n\n"
+    "URI: http://localhost:3000\n"
+    "Version: 1\n"
+    "Chain ID: 1\n"
+    "Nonce: 32891756\n"
+    "Issued At: 2024-01-01T00:00:00Z\n"
+    "Expiration Time: 2024-01-02T00:00:00Z"
+)
+
+
+def synthetic_transfer_logs(n: int, holders: int = 500, seed: int = 7) -> list[dict]:
+    """Logs Transfer au format web3 (HexBytes) avec `holders` adresses distinctes."""
+    rng = random.Random(seed)
+    addrs = [rng.getrandbits(160).to_bytes(20, "big") for _ in range(holders)]
+    logs = []
+    for i in range(n):
+        logs.append({
+            "address": "0x" + "ab" * 20,
+            "topics": [
+                ERC20_TRANSFER_TOPIC,
+                HexBytes(b"\x00" * 12 + rng.choice(addrs)),
+                HexBytes(b"\x00" * 12 + rng.choice(addrs)),
+            ],
+            "data": HexBytes(rng.getrandbits(96).to_bytes(32, "big")),
+            "blockNumber": 1_000_000 + i // 4,
+            "logIndex": i % 4,
+            "transactionHash": HexBytes(rng.getrandbits(256).to_bytes(32, "big")),
+            "blockHash": HexBytes(rng.getrandbits(256).to_bytes(32, "big")),
+        })
+    return logs
+
+
+def synthetic_wallet_txs(n: int, seed: int = 7) -> list[dict]:
+    """txlist explorer : transfer() ERC20 vers des tokens quelconques + appels inconnus."""
+    rng = random.Random(seed)
+    txs = []
+    for i in range(n):
+        if i % 4:
+            calldata = "a9059cbb" + "00" * 12 + rng.getrandbits(160).to_bytes(20, "big").hex() + "%064x" % rng.getrandbits(96)
+        else:
+            calldata = "%08x" % rng.getrandbits(32)
+        txs.append({"hash": "0x%064x" % rng.getrandbits(256), "to": "0x%040x" % rng.getrandbits(160), "input": "0x" + calldata})
+    return txs
+
+
+def bench(fn, repeat: int, number: int) -> dict:
+    """Meilleur temps par appel sur `repeat` séries de `number` appels."""
+    fn()  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return {"per_call_us": best * 1e6, "ops_per_s": 1 / best if best else 0.0, "number": number}
+
+
+def cases(log_count: int) -> dict:
+    logs = synthetic_transfer_logs(log_count)
+    txs = synthetic_wallet_txs(1_000)
+    return {
+        "compile_contract[HelloStorage]": (
+            lambda: compile_contract("app/api/contracts/hello.sol", "HelloStorage"), 3, 1,
+        ),
+        "compile_contract[MyToken]": (
+            lambda: compile_contract("app/api/contracts/erc20_openzeppelin.sol", "MyToken"), 3, 1,
+        ),
+        "parse_siwe": (lambda: parse_siwe(SIWE_SAMPLE), 5, 10_000),
+        f"decode_transfer_log x{log_count}": (
+            lambda: [decode_transfer_log(log) for log in logs], 5, 1,
+        ),
+        f"decode_transfer_logs x{log_count}": (lambda: decode_transfer_logs(logs), 5, 1),
+        "abi_index.label_txs x1000": (lambda: abi_index.label_txs(txs, "sepolia"), 5, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=10_000, help="taille du lot de logs à décoder")
+    parser.add_argument("--only", help="sous-chaîne du nom de cas à exécuter")
+    parser.add_argument("--json", help="écrit les résultats JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (fn, repeat, number) in cases(args.logs).items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = r = bench(fn, repeat, number)
+        print(f"{name:<40}{r['per_call_us']:>14.1f} µs/call{r['ops_per_s']:>14.1f} ops/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# bench/stand_ins.py
+"""
+Doublures locales pour le benchmark : chaîne (anvil), explorer (faux Etherscan)
+et MongoDB (mongod local ou mongomock_motor).
+"""
+import asyncio
+import random
+import shutil
+import socket
+import subprocess
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Query
+from web3 import Web3
+
+from app.api.services.solidity_compiler import compile_contract
+
+ERC20_SOURCE = "app/api/contracts/erc20_openzeppelin.sol"
+HELLO_SOURCE = "app/api/contracts/hello.sol"
+
+
+# ===== Serveurs uvicorn dans un thread =====
+def _port_open(host: str, port: int) -> bool:
+    with socket.socket() as s:
+        s.settimeout(0.2)
+        return s.connect_ex((host, port)) == 0
+
+
+def serve_in_thread(app, port: int, host: str = "127.0.0.1") -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError(f"Server on port {port} did not start")
+        time.sleep(0.05)
+    return server
+
+
+# ===== Chaîne : anvil =====
+def start_anvil(port: int = 8545) -> subprocess.Popen | None:
+    """Démarre anvil si rien n'écoute déjà sur le port (sinon on réutilise)."""
+    if _port_open("127.0.0.1", port):
+        return None
+    binary = shutil.which("anvil")
+    if not binary:
+        raise RuntimeError("anvil not found in PATH (install foundry) and no RPC on port %d" % port)
+
+    proc = subprocess.Popen(
+        [binary, "--port", str(port), "--silent"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 15
+    while not _port_open("127.0.0.1", port):
+        if time.time() > deadline:
+            proc.kill()
+            raise RuntimeError("anvil did not start")
+        time.sleep(0.1)
+    return proc
+
+
+def _deploy(w3: Web3, abi, bytecode, *args) -> str:
+    contract = w3.eth.contract(abi=abi, bytecode=bytecode)
+    tx_hash = contract.constructor(*args).transact({"from": w3.eth.accounts[0]})
+    return w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+
+
+def seed_chain(rpc_url: str, transfers: int = 200) -> dict:
+    """
+    Déploie MyToken + HelloStorage avec le compte anvil #0 puis génère
+    `transfers` événements Transfer entre les comptes pré-financés.
+    """
+    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    accounts = w3.eth.accounts
+
+    erc20_abi, erc20_bytecode = compile_contract(ERC20_SOURCE, "MyToken")
+    hello_abi, hello_bytecode = compile_contract(HELLO_SOURCE, "HelloStorage")
+
+    token_address = _deploy(w3, erc20_abi, erc20_bytecode, "Bench", "BNCH", 10**30, 18)
+    hello_address = _deploy(w3, hello_abi, hello_bytecode, "hello bench")
+
+    token = w3.eth.contract(address=token_address, abi=erc20_abi)
+    rng = random.Random(42)
+    holders = accounts[1:10]
+    for _ in range(transfers):
+        to = rng.choice(holders)
+        token.functions.transfer(to, rng.randint(1, 10**20)).transact({"from": accounts[0]})
+
+    return {
+        "token": token_address,
+        "token_abi": erc20_abi,
+        "hello": hello_address,
+        "accounts": accounts,
+    }
+
+
+# ===== Explorer : faux Etherscan =====
+def make_mock_explorer(latency_ms: float = 0.0, txs_per_wallet: int = 20) -> FastAPI:
+    """Répond aux actions account/balance et account/txlist comme Etherscan."""
+    app = FastAPI()
+
+    @app.get("/api")
+    async def api(
+        module: str = Query(...),
+        action: str = Query(...),
+        address: str = Query(""),
+        offset: int = Query(20),
+        page: int = Query(1),
+    ):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        if module == "account" and action == "balance":
+            return {"status": "1", "message": "OK", "result": str(10**18)}
+
+        if module == "account" and action == "txlist":
+            count = min(offset, txs_per_wallet)
+            return {
+                "status": "1",
+                "message": "OK",
+                "result": [
+                    {
+                        "blockNumber": str(1000 + i),
+                        "hash": "0x" + f"{(page * 1000 + i):064x}",
+                        "from": address,
+                        "to": "0x" + "11" * 20,
+                        "value": str(i * 10**15),
+                        "input": "0xa9059cbb" + "00" * 64,
+                        "gasUsed": "51000",
+                        "isError": "0",
+                    }
+                    for i in range(count)
+                ],
+            }
+
+        return {"status": "0", "message": "NOTOK", "result": f"unsupported {module}/{action}"}
+
+    return app
+
+
+# ===== MongoDB =====
+def use_mongomock():
+    """
+    Remplace init_db par une base mongomock_motor en mémoire.
+    À appeler avant le démarrage de l'app.
+    """
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.main as main
+    from app.db.init_db import DOCUMENT_MODELS
+
+    async def init_mock_db():
+        client = AsyncMongoMockClient()
+        await init_beanie(
+            database=client["web3_nocode_bench"],
+            document_models=DOCUMENT_MODELS,
+        )
+
+    main.init_db = init_mock_db
@@ -0,0 +1,130 @@
+# bench/startup.py
+"""
+Profil de démarrage : temps d'import de app.main dans un interpréteur neuf
+(ce que paie chaque worker / conteneur avant d'être prêt).
+
+    python -m bench.startup
+    python -m bench.startup --runs 7 --top 15 --json startup.json
+    python -m bench.startup --baseline startup_baseline.json --tolerance 0.2
+
+S'appuie sur `python -X importtime`. Sort en erreur si un module lourd
+censé être chargé à la demande (web3, eth_account, solcx) est importé au
+démarrage, ou si le temps médian régresse au-delà de --tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+TARGET = "app.main"
+
+# chargés au premier usage seulement (cf. rpc_utils, routes_auth, solidity_compiler)
+LAZY_MODULES = ("web3", "eth_account", "solcx", "py_ecc")
+
+
+def profile_once(target: str) -> tuple[float, dict[str, int]]:
+    """
+    Un import à froid : (secondes, {package racine: µs}). Les temps *self*
+    sont additifs : leur somme par package racine (fastapi, beanie, app...)
+    répartit exactement le total.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    packages: dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us)
+        if name == target:
+            total_us = int(cumulative)
+    return total_us / 1e6, dict(packages)
+
+
+def run(target: str, runs: int) -> dict:
+    timings = []
+    modules: dict[str, list[int]] = defaultdict(list)
+    for _ in range(runs):
+        seconds, packages = profile_once(target)
+        timings.append(seconds)
+        for name, us in packages.items():
+            modules[name].append(us)
+
+    return {
+        "target": target,
+        "runs": runs,
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "modules_ms": {
+            name: statistics.median(values) / 1000
+            for name, values in sorted(modules.items(), key=lambda kv: -statistics.median(kv[1]))
+        },
+    }
+
+
+def eager_heavy_modules(target: str) -> list[str]:
+    """Modules de LAZY_MODULES présents dans sys.modules après l'import."""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"import sys, {target}; print(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    loaded = set(proc.stdout.split())
+    return [m for m in LAZY_MODULES if m in loaded]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default=TARGET)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="packages les plus coûteux affichés")
+    parser.add_argument("--json", help="écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--baseline", help="rapport JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = run(args.target, args.runs)
+    report["eager_heavy_modules"] = eager_heavy_modules(args.target)
+
+    print(f"import {report['target']}: median {report['median_s'] * 1000:.0f} ms "
+          f"(min {report['min_s'] * 1000:.0f}, max {report['max_s'] * 1000:.0f}, {args.runs} runs)")
+    for name, ms in list(report["modules_ms"].items())[:args.top]:
+        print(f"  {name:<32}{ms:>9.1f} ms")
+
+    failed = False
+    if report["eager_heavy_modules"]:
+        print("EAGER IMPORT", ", ".join(report["eager_heavy_modules"]))
+        failed = True
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        if report["median_s"] > base["median_s"] * (1 + args.tolerance):
+            print(f"REGRESSION import {report['target']}: {report['median_s'] * 1000:.0f}ms > "
+                  f"baseline {base['median_s'] * 1000:.0f}ms (+{args.tolerance:.0%})")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
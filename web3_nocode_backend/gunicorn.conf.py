@@ -0,0 +1,44 @@
+# gunicorn.conf.py — serveur de production
+#
+#   ./run_prod.sh   (ou: gunicorn app.main:app -c gunicorn.conf.py)
+#
+# Un worker uvicorn (process + event loop) par cœur. Tout état partagé entre
+# requêtes vit dans Mongo/Redis ; les caches en mémoire (web3, solc,
+# singleflight) restent locaux à chaque worker.
+import os
+import shutil
+from multiprocessing import cpu_count
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# arrêt : SIGTERM → plus de nouvelles connexions, les requêtes en cours
+# (exports en flux compris) ont graceful_timeout secondes pour finir
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+keepalive = 5
+
+# recyclage périodique (fuites lentes), décalé pour ne pas tout redémarrer d'un coup
+max_requests = int(os.getenv("MAX_REQUESTS", 10_000))
+max_requests_jitter = 1_000
+
+accesslog = None
+errorlog = "-"
+
+# ===== Prometheus multiprocess =====
+# PROMETHEUS_MULTIPROC_DIR doit être défini avant l'import de prometheus_client
+# dans les workers : on le pose ici, dans le master, avant le fork.
+PROMETHEUS_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/web3_nocode_prometheus")
+
+
+def on_starting(server):
+    # fichiers .db d'un run précédent → compteurs faussés
+    shutil.rmtree(PROMETHEUS_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
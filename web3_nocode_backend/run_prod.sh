@@ -0,0 +1,9 @@
+#!/bin/bash
+# Production : N workers uvicorn sous gunicorn (cf. gunicorn.conf.py)
+# JWT_SECRET doit être identique sur toutes les instances.
+# solc doit être pré-provisionné dans l'image (pas de téléchargement au runtime) :
+#   python -m app.api.services.solidity_compiler install
+# puis les contrats fournis pré-compilés en un bundle chargé au démarrage :
+#   python -m app.api.services.artifact_bundle build
+export SOLC_ALLOW_DOWNLOAD=${SOLC_ALLOW_DOWNLOAD:-false}
+exec gunicorn app.main:app -c gunicorn.conf.py
@@ -0,0 +1,114 @@
+# tests/test_log_fetcher.py
+"""
+Erreurs eth_getLogs réelles des fournisseurs → (taille suggérée, plage max),
+et apprentissage de la taille de fenêtre par ProviderLogs.
+
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.utils import log_fetcher
+from app.utils.log_fetcher import MAX_SPAN, MAX_SPAN_TTL, ProviderLogs, _range_error
+
+INFURA = (
+    "{'code': -32005, 'message': 'query returned more than 10000 results. "
+    "Try with this block range [0x1E8480, 0x1E8F5C].'}"
+)
+ALCHEMY = (
+    "{'code': -32602, 'message': 'Log response size exceeded. You can make eth_getLogs "
+    "requests with up to a 2K block range and no limit on the response size, or you can "
+    "request any block range with a cap of 10K logs in the response. Based on your "
+    "parameters and the response size limit, this block range should work: [0x0, 0x1d4b]'}"
+)
+ALCHEMY_FREE_TIER = (
+    "{'code': -32600, 'message': 'Under the Free tier plan, you can make eth_getLogs "
+    "requests with up to a 10 block range. Based on your parameters, this block range "
+    "should work: [0x1234, 0x123d]. Upgrade to PAYG for expanded block range.'}"
+)
+QUICKNODE = "{'code': -32614, 'message': 'eth_getLogs and eth_newFilter are limited to a 10,000 blocks range'}"
+LIMITED_RANGE = "{'code': -32600, 'message': 'eth_getLogs is limited to a 10,000 range'}"
+LIMITED_RANGE_K = "{'code': -32600, 'message': 'eth_getLogs is limited to a 5K block range'}"
+BSC_DATASEED = "{'code': -32000, 'message': 'exceed maximum block range: 5000'}"
+POLYGON_RPC = "{'code': -32000, 'message': 'block range is too wide'}"
+POLYGON_TOO_LARGE = "{'code': -32062, 'message': 'Block range is too large'}"
+AVALANCHE = "{'code': -32000, 'message': 'requested too many blocks from 0 to 100000, maximum is set to 2048'}"
+
+
+@pytest.mark.parametrize("message, expected", [
+    (INFURA, (0x1E8F5C - 0x1E8480 + 1, None)),
+    # "cap of 10K logs" est un plafond de résultats, pas de plage
+    (ALCHEMY, (0x1D4C, None)),
+    (ALCHEMY_FREE_TIER, (10, 10)),
+    (QUICKNODE, (None, 10_000)),
+    (LIMITED_RANGE, (None, 10_000)),
+    (LIMITED_RANGE_K, (None, 5_000)),
+    (BSC_DATASEED, (None, 5_000)),
+    (POLYGON_RPC, (None, None)),
+    (POLYGON_TOO_LARGE, (None, None)),
+    (AVALANCHE, (None, 2_048)),
+    ("{'code': -32000, 'message': 'request timed out'}", (None, None)),
+])
+def test_range_error_parses_provider_messages(message, expected):
+    assert _range_error(ValueError(message)) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "execution reverted",
+    "{'code': -32602, 'message': 'invalid argument 0: hex string without 0x prefix'}",
+    "Unsupported network: foo",
+])
+def test_range_error_ignores_other_errors(message):
+    assert _range_error(ValueError(message)) is None
+
+
+def _fake_rpc(limit_error, max_size):
+    """rpc() simulé : refuse les fenêtres de plus de `max_size` blocs."""
+    calls = []
+
+    async def rpc(network, method, criteria):
+        size = criteria["toBlock"] - criteria["fromBlock"] + 1
+        calls.append(size)
+        if size > max_size:
+            raise ValueError(limit_error)
+        return []
+
+    return rpc, calls
+
+
+def test_alchemy_log_cap_does_not_pin_max_span(monkeypatch):
+    rpc, _ = _fake_rpc(ALCHEMY, 7_500)
+    monkeypatch.setattr(log_fetcher, "rpc", rpc)
+    provider = ProviderLogs("test-alchemy")
+    provider.span = 100_000
+
+    asyncio.run(provider.fetch({"address": "0x0"}, 0, 199_999))
+
+    assert provider.max_span == MAX_SPAN
+    assert provider.span >= 7_500 // 2
+
+
+def test_explicit_max_range_is_learned_then_relaxed(monkeypatch):
+    rpc, calls = _fake_rpc(BSC_DATASEED, 5_000)
+    monkeypatch.setattr(log_fetcher, "rpc", rpc)
+    provider = ProviderLogs("test-bsc")
+    provider.span = 20_000
+
+    asyncio.run(provider.fetch({"address": "0x0"}, 0, 19_999))
+    assert provider.max_span == 5_000
+    assert max(calls[1:]) <= 5_000
+
+    # plafond oublié après MAX_SPAN_TTL : la fenêtre peut de nouveau grandir
+    provider.max_span_at -= MAX_SPAN_TTL + 1
+    asyncio.run(provider.fetch({"address": "0x0"}, 0, provider.span - 1))
+    assert provider.max_span == MAX_SPAN
+    assert provider.span > 5_000
+
+
+def test_non_range_error_is_raised(monkeypatch):
+    rpc, _ = _fake_rpc("execution reverted", 0)
+    monkeypatch.setattr(log_fetcher, "rpc", rpc)
+
+    with pytest.raises(ValueError, match="execution reverted"):
+        asyncio.run(ProviderLogs("test-other").fetch({"address": "0x0"}, 0, 99))